@@ -0,0 +1,236 @@
+"""
+Persistent SQLite store of accepted SoccerVista -> SportyBet name resolutions.
+
+match_games.py records every league and team mapping it accepts, with its
+match score and the date it was last seen. Later runs resolve known names with
+an indexed lookup and only fall back to fuzzy matching for new names.
+
+Manual overrides are "pinned": automatic runs never overwrite them.
+
+Usage:
+  python3 tools/alias_store.py list [leagues|teams]
+  python3 tools/alias_store.py set-league <sv_country> <sv_league> <sb_full_league>
+  python3 tools/alias_store.py delete-league <sv_country> <sv_league>
+  python3 tools/alias_store.py set-team <sb_league> <sv_team> <sb_team>
+  python3 tools/alias_store.py delete-team <sb_league> <sv_team>
+  python3 tools/alias_store.py prune <days>
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+DEFAULT_ALIAS_DB = '.tmp/aliases.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS league_aliases (
+    sv_country     TEXT NOT NULL,
+    sv_league      TEXT NOT NULL,
+    sb_full_league TEXT NOT NULL,
+    score          REAL NOT NULL,
+    last_seen      TEXT NOT NULL,
+    pinned         INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sv_country, sv_league)
+);
+CREATE TABLE IF NOT EXISTS team_aliases (
+    sb_league  TEXT NOT NULL,
+    sv_team    TEXT NOT NULL,
+    sb_team    TEXT NOT NULL,
+    score      REAL NOT NULL,
+    last_seen  TEXT NOT NULL,
+    pinned     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sb_league, sv_team)
+);
+"""
+
+# Manual overrides are stored with this score
+PINNED_SCORE = 100.0
+
+
+def open_store(path=DEFAULT_ALIAS_DB):
+    """Open (and create if needed) the alias database at path."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def open_store_readonly(path=DEFAULT_ALIAS_DB):
+    """Open an existing alias database for lookups only (e.g. from worker processes)."""
+    return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+
+
+def lookup_league(conn, sv_country, sv_league):
+    """Return (sb_full_league, score) for a known SoccerVista league, or None."""
+    return conn.execute(
+        "SELECT sb_full_league, score FROM league_aliases WHERE sv_country = ? AND sv_league = ?",
+        (sv_country, sv_league),
+    ).fetchone()
+
+
+def record_league(conn, sv_country, sv_league, sb_full_league, score, seen=None):
+    """Insert or refresh an automatically accepted league resolution.
+
+    Pinned (manual) entries keep their mapping; only last_seen is refreshed.
+    """
+    seen = seen or date.today().isoformat()
+    conn.execute(
+        """
+        INSERT INTO league_aliases (sv_country, sv_league, sb_full_league, score, last_seen)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (sv_country, sv_league) DO UPDATE SET
+            sb_full_league = CASE WHEN pinned THEN sb_full_league ELSE excluded.sb_full_league END,
+            score = CASE WHEN pinned THEN score ELSE excluded.score END,
+            last_seen = excluded.last_seen
+        """,
+        (sv_country, sv_league, sb_full_league, float(score), seen),
+    )
+
+
+def touch_league(conn, sv_country, sv_league, seen=None):
+    """Mark a league resolution as used today, so prune() keeps it."""
+    conn.execute(
+        "UPDATE league_aliases SET last_seen = ? WHERE sv_country = ? AND sv_league = ?",
+        (seen or date.today().isoformat(), sv_country, sv_league),
+    )
+
+
+def lookup_team(conn, sb_league, sv_team):
+    """Return (sb_team, score) for a known SoccerVista team in a SportyBet league, or None."""
+    return conn.execute(
+        "SELECT sb_team, score FROM team_aliases WHERE sb_league = ? AND sv_team = ?",
+        (sb_league, sv_team),
+    ).fetchone()
+
+
+def record_team(conn, sb_league, sv_team, sb_team, score, seen=None):
+    """Insert or refresh an automatically accepted team resolution (pinned entries are kept)."""
+    seen = seen or date.today().isoformat()
+    conn.execute(
+        """
+        INSERT INTO team_aliases (sb_league, sv_team, sb_team, score, last_seen)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (sb_league, sv_team) DO UPDATE SET
+            sb_team = CASE WHEN pinned THEN sb_team ELSE excluded.sb_team END,
+            score = CASE WHEN pinned THEN score ELSE excluded.score END,
+            last_seen = excluded.last_seen
+        """,
+        (sb_league, sv_team, sb_team, float(score), seen),
+    )
+
+
+def touch_team(conn, sb_league, sv_team, seen=None):
+    """Mark a team resolution as used today, so prune() keeps it."""
+    conn.execute(
+        "UPDATE team_aliases SET last_seen = ? WHERE sb_league = ? AND sv_team = ?",
+        (seen or date.today().isoformat(), sb_league, sv_team),
+    )
+
+
+def set_league(conn, sv_country, sv_league, sb_full_league):
+    """Pin a manual league override."""
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO league_aliases
+            (sv_country, sv_league, sb_full_league, score, last_seen, pinned)
+        VALUES (?, ?, ?, ?, ?, 1)
+        """,
+        (sv_country, sv_league, sb_full_league, PINNED_SCORE, date.today().isoformat()),
+    )
+
+
+def set_team(conn, sb_league, sv_team, sb_team):
+    """Pin a manual team override."""
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO team_aliases
+            (sb_league, sv_team, sb_team, score, last_seen, pinned)
+        VALUES (?, ?, ?, ?, ?, 1)
+        """,
+        (sb_league, sv_team, sb_team, PINNED_SCORE, date.today().isoformat()),
+    )
+
+
+def delete_league(conn, sv_country, sv_league):
+    """Invalidate a league resolution. Returns the number of rows removed."""
+    cur = conn.execute(
+        "DELETE FROM league_aliases WHERE sv_country = ? AND sv_league = ?",
+        (sv_country, sv_league),
+    )
+    return cur.rowcount
+
+
+def delete_team(conn, sb_league, sv_team):
+    """Invalidate a team resolution. Returns the number of rows removed."""
+    cur = conn.execute(
+        "DELETE FROM team_aliases WHERE sb_league = ? AND sv_team = ?",
+        (sb_league, sv_team),
+    )
+    return cur.rowcount
+
+
+def prune(conn, days):
+    """Drop unpinned entries not seen in the last `days` days. Returns rows removed."""
+    cutoff = (date.today() - timedelta(days=days)).isoformat()
+    removed = 0
+    for table in ('league_aliases', 'team_aliases'):
+        cur = conn.execute(
+            f"DELETE FROM {table} WHERE pinned = 0 AND last_seen < ?", (cutoff,)
+        )
+        removed += cur.rowcount
+    return removed
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    command, args = sys.argv[1], sys.argv[2:]
+    db_path = os.getenv('ALIAS_DB', DEFAULT_ALIAS_DB)
+    conn = open_store(db_path)
+
+    if command == 'list':
+        tables = args or ['leagues', 'teams']
+        if 'leagues' in tables:
+            print("=== LEAGUE ALIASES ===")
+            for row in conn.execute(
+                "SELECT * FROM league_aliases ORDER BY sv_country, sv_league"
+            ):
+                sv_country, sv_league, sb_full_league, score, last_seen, pinned = row
+                flag = ' [pinned]' if pinned else ''
+                print(f"  {sv_country}: {sv_league} -> {sb_full_league} "
+                      f"({score:.0f}%, last seen {last_seen}){flag}")
+        if 'teams' in tables:
+            print("=== TEAM ALIASES ===")
+            for row in conn.execute(
+                "SELECT * FROM team_aliases ORDER BY sb_league, sv_team"
+            ):
+                sb_league, sv_team, sb_team, score, last_seen, pinned = row
+                flag = ' [pinned]' if pinned else ''
+                print(f"  [{sb_league}] {sv_team} -> {sb_team} "
+                      f"({score:.0f}%, last seen {last_seen}){flag}")
+    elif command == 'set-league' and len(args) == 3:
+        set_league(conn, *args)
+        print(f"Pinned league alias: {args[0]}: {args[1]} -> {args[2]}")
+    elif command == 'delete-league' and len(args) == 2:
+        print(f"Removed {delete_league(conn, *args)} league alias(es)")
+    elif command == 'set-team' and len(args) == 3:
+        set_team(conn, *args)
+        print(f"Pinned team alias: [{args[0]}] {args[1]} -> {args[2]}")
+    elif command == 'delete-team' and len(args) == 2:
+        print(f"Removed {delete_team(conn, *args)} team alias(es)")
+    elif command == 'prune' and len(args) == 1:
+        print(f"Removed {prune(conn, int(args[0]))} stale alias(es)")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+    conn.commit()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Backtest SoccerVista win probabilities against final results.
+
+Historical snapshots (soccervista_*.md, or soccervista_matches .arrow tables
+written by parse_soccervista.py) are parsed in parallel and dated from their
+file names the same way combine_predictions.py does. Fixtures listed in more
+than one snapshot are kept once. Each prediction is joined to a local results
+file on (date, home team, away team), using match_games.normalize for the
+team names. A prediction is a hit when the predicted side won; a draw is a
+miss.
+
+Parsed snapshots are cached as Arrow tables in .tmp/backtest_cache/ (keyed
+by path, mtime and size), so replaying a season again only re-parses new or
+changed snapshots.
+
+For every settled prediction, the evaluation runs as one vectorized pass over
+probability-sorted arrays:
+  Thresholds   bets, hits, hit rate and ROI for every "probability >= t" cut-off
+  Bands        the same for closed ranges, e.g. 60-70 (combine_predictions.py)
+               and 60-100 (parse_soccervista.py / match_games.py)
+  Calibration  predicted vs observed hit rate per probability bucket
+
+Results file (CSV or .xlsx), one row per game:
+  Date (YYYY-MM-DD), Home Team, Away Team, Home Goals, Away Goals
+  optional: Home Odds, Away Odds (decimal). ROI is a 1-unit stake at the
+  predicted side's odds, over the bets that have odds. Games with blank goals
+  (postponed, abandoned, not played yet) are skipped and counted.
+
+Usage:
+  python3 tools/backtest.py --results results.csv [PATH | DIR | GLOB ...]
+      [--thresholds 50:95:5] [--band 60-70 ...] [--bucket 5] [--output .tmp/backtest.xlsx]
+      [--no-cache]
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from combine_predictions import DEFAULT_SNAPSHOTS, FIXTURE_KEY, discover_snapshots, infer_snapshot_date
+from match_games import normalize
+from metrics import count, instrumented, span
+from parse_soccervista import parse_matches, records_to_frame
+from tables import TABLE_EXTENSION, read_table, write_table
+
+RESULT_COLUMNS = ['Date', 'Home Team', 'Away Team', 'Home Goals', 'Away Goals']
+ODDS_COLUMNS = ['Home Odds', 'Away Odds']
+JOIN_KEY = ['Date', 'home_norm', 'away_norm']
+
+DEFAULT_THRESHOLDS = '50:95:5'
+# The cut-offs the tools use today: combine_predictions.py and parse_soccervista.py/match_games.py
+DEFAULT_BANDS = ['60-70', '60-100']
+DEFAULT_BUCKET = 5
+DEFAULT_OUTPUT = '.tmp/backtest.xlsx'
+CACHE_DIR = '.tmp/backtest_cache'
+
+
+def cached_parse(path, cache_dir=CACHE_DIR):
+    """Parse a snapshot into a DataFrame, reusing the cached table while the file is unchanged."""
+    if not cache_dir:
+        return records_to_frame(parse_matches(path))
+    st = os.stat(path)
+    prefix = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    cached = os.path.join(cache_dir, f"{prefix}_{st.st_mtime_ns}_{st.st_size}{TABLE_EXTENSION}")
+    if os.path.exists(cached):
+        return read_table('soccervista_matches', cached)
+
+    df = records_to_frame(parse_matches(path))
+    # Drop the tables cached for earlier versions of this file
+    for stale in glob.glob(os.path.join(cache_dir, f"{prefix}_*{TABLE_EXTENSION}")):
+        os.remove(stale)
+    write_table(df, 'soccervista_matches', cached)
+    return df
+
+
+def load_snapshot(path, cache_dir=CACHE_DIR):
+    """Parse one snapshot or read one parsed table, with its inferred date (runs in a worker)."""
+    if path.endswith(TABLE_EXTENSION):
+        df = read_table('soccervista_matches', path)
+    else:
+        df = cached_parse(path, cache_dir)
+    df['Date'] = infer_snapshot_date(path).isoformat()
+    return df
+
+
+def load_predictions(paths, cache_dir=CACHE_DIR):
+    """All predictions from the snapshots, one row per dated fixture (freshest snapshot wins)."""
+    # Oldest scrape first, so the freshest copy of a duplicated fixture wins below
+    paths = sorted(paths, key=os.path.getmtime)
+    with ProcessPoolExecutor() as pool:
+        frames = [df for df in pool.map(load_snapshot, paths, [cache_dir] * len(paths)) if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates(subset=['Date'] + FIXTURE_KEY, keep='last').reset_index(drop=True)
+
+
+def load_results(path):
+    """Read the results file and check its columns."""
+    if path.endswith('.xlsx'):
+        df = pd.read_excel(path)
+    else:
+        df = pd.read_csv(path)
+    missing = [c for c in RESULT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
+    return df
+
+
+def add_team_keys(df):
+    """Add normalized home/away team columns, normalizing each distinct name once."""
+    for column, key in (('Home Team', 'home_norm'), ('Away Team', 'away_norm')):
+        names = df[column].astype(str)
+        df[key] = names.map({name: normalize(name) for name in names.unique()})
+    return df
+
+
+def settle(predictions, results):
+    """Join predictions to results.
+
+    Returns (settled, unplayed): the settled predictions with Hit and Odds
+    columns, and how many predictions matched a result without a final score
+    (blank or non-numeric goals, e.g. postponed games). Those are left out
+    rather than scored as misses.
+    """
+    results = results.drop_duplicates(subset=JOIN_KEY, keep='last')
+    columns = JOIN_KEY + ['Home Goals', 'Away Goals'] + [c for c in ODDS_COLUMNS if c in results.columns]
+    settled = predictions.merge(results[columns], on=JOIN_KEY, how='inner')
+    for column in ('Home Goals', 'Away Goals'):
+        settled[column] = pd.to_numeric(settled[column], errors='coerce')
+    played = settled[['Home Goals', 'Away Goals']].notna().all(axis=1)
+    unplayed = int((~played).sum())
+    settled = settled[played].reset_index(drop=True)
+
+    home_side = (settled['Predicted Side'] == 'Home').to_numpy()
+    margin = (settled['Home Goals'] - settled['Away Goals']).to_numpy()
+    settled['Hit'] = np.where(home_side, margin > 0, margin < 0)
+    if all(c in settled.columns for c in ODDS_COLUMNS):
+        settled['Odds'] = np.where(home_side, settled['Home Odds'], settled['Away Odds']).astype(np.float64)
+    else:
+        settled['Odds'] = np.nan
+    return settled, unplayed
+
+
+def cumulative_sums(settled):
+    """Probability-sorted suffix sums of the per-bet values, for O(log n) range queries.
+
+    Returns (sorted probabilities, suffix) where suffix[:, i] sums bets, hits,
+    probability, priced bets and profit over the bets from sorted position i up.
+    """
+    probs = settled['Win Probability %'].to_numpy(dtype=np.float64)
+    hits = settled['Hit'].to_numpy(dtype=np.float64)
+    odds = settled['Odds'].to_numpy(dtype=np.float64)
+    priced = ~np.isnan(odds)
+    profit = np.where(priced, np.where(hits > 0, odds - 1, -1.0), 0.0)
+
+    order = np.argsort(probs, kind='stable')
+    values = np.stack([np.ones_like(probs), hits, probs, priced.astype(np.float64), profit])[:, order]
+    # The extra zero column is the (empty) suffix past the last bet
+    suffix = np.concatenate([np.cumsum(values[:, ::-1], axis=1)[:, ::-1],
+                             np.zeros((len(values), 1))], axis=1)
+    return probs[order], suffix
+
+
+def sums_at_least(cumulative, lows):
+    """Summed values over bets with probability >= each low."""
+    probs, suffix = cumulative
+    return suffix[:, np.searchsorted(probs, lows, side='left')]
+
+
+def sums_above(cumulative, highs):
+    """Summed values over bets with probability > each high."""
+    probs, suffix = cumulative
+    return suffix[:, np.searchsorted(probs, highs, side='right')]
+
+
+def _summary(sums):
+    """Bets / hits / rates / ROI columns from a (5, k) matrix of summed values."""
+    bets, hits, prob, priced, profit = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'Bets': bets.astype(np.int64),
+            'Hits': hits.astype(np.int64),
+            'Hit Rate %': np.round(hits / bets * 100, 1),
+            'Avg Probability %': np.round(prob / bets, 1),
+            'Bets With Odds': priced.astype(np.int64),
+            'Profit': np.round(profit, 2),
+            'ROI %': np.round(profit / priced * 100, 1),
+        }
+
+
+def threshold_table(cumulative, thresholds):
+    """One row per "probability >= t" cut-off."""
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    sums = sums_at_least(cumulative, thresholds)
+    return pd.DataFrame(dict({'Min Probability %': thresholds}, **_summary(sums)))
+
+
+def band_table(cumulative, bands):
+    """One row per closed probability range (low, high)."""
+    lows = np.array([low for low, _ in bands], dtype=np.float64)
+    highs = np.array([high for _, high in bands], dtype=np.float64)
+    sums = sums_at_least(cumulative, lows) - sums_above(cumulative, highs)
+    return pd.DataFrame(dict({'Band': [f"{low:g}-{high:g}%" for low, high in bands]}, **_summary(sums)))
+
+
+def calibration_table(settled, bucket=DEFAULT_BUCKET):
+    """Predicted vs observed hit rate per `bucket`-wide probability bucket (empty buckets omitted)."""
+    probs = settled['Win Probability %'].to_numpy(dtype=np.float64)
+    hits = settled['Hit'].to_numpy(dtype=np.float64)
+    # 100% falls in the last bucket rather than one of its own
+    index = np.minimum(probs // bucket, 100 // bucket - (100 % bucket == 0)).astype(np.int64)
+    size = int(100 // bucket) + 1
+    bets = np.bincount(index, minlength=size)
+    hit_counts = np.bincount(index, weights=hits, minlength=size)
+    prob_sums = np.bincount(index, weights=probs, minlength=size)
+    used = bets > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        observed = np.round(hit_counts / bets * 100, 1)
+        predicted = np.round(prob_sums / bets, 1)
+    lows = np.arange(size) * bucket
+    return pd.DataFrame({
+        'Bucket': [f"{low:g}-{min(low + bucket, 100):g}%" for low in lows[used]],
+        'Bets': bets[used],
+        'Avg Probability %': predicted[used],
+        'Hit Rate %': observed[used],
+        'Gap (pts)': np.round(observed[used] - predicted[used], 1),
+    })
+
+
+def parse_thresholds(spec):
+    """'50:95:5' -> [50, 55, ..., 95] (stop inclusive)."""
+    start, stop, step = (float(part) for part in spec.split(':'))
+    return np.arange(start, stop + step / 2, step)
+
+
+def parse_band(spec):
+    """'60-70' -> (60.0, 70.0)."""
+    low, high = (float(part) for part in spec.split('-'))
+    return low, high
+
+
+@instrumented('backtest')
+def main():
+    parser = argparse.ArgumentParser(description="Backtest SoccerVista win probabilities against results")
+    parser.add_argument('snapshots', nargs='*', default=[DEFAULT_SNAPSHOTS],
+                        help="Snapshot files, directories or glob patterns")
+    parser.add_argument('--results', required=True, help="Results file (CSV or .xlsx)")
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS, help="Cut-offs as START:STOP:STEP")
+    parser.add_argument('--band', action='append', help="Closed probability range LOW-HIGH (repeatable)")
+    parser.add_argument('--bucket', type=float, default=DEFAULT_BUCKET, help="Calibration bucket width")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Excel report")
+    parser.add_argument('--no-cache', action='store_true', help=f"Re-parse every snapshot (skip {CACHE_DIR})")
+    args = parser.parse_args()
+
+    snapshots = discover_snapshots(args.snapshots)
+    snapshots += [p for pattern in args.snapshots if os.path.isdir(pattern)
+                  for p in discover_snapshots([os.path.join(pattern, f"soccervista_*{TABLE_EXTENSION}")])]
+    if not snapshots:
+        print(f"No SoccerVista snapshots found for: {' '.join(args.snapshots)}")
+        sys.exit(1)
+    if not os.path.exists(args.results):
+        print(f"Error: {args.results} not found.")
+        sys.exit(1)
+
+    with span('parse'):
+        predictions = load_predictions(snapshots, None if args.no_cache else CACHE_DIR)
+        results = load_results(args.results)
+    count('snapshots_parsed', len(snapshots))
+    count('rows_parsed', len(predictions))
+    if predictions.empty:
+        print("No predictions found!")
+        sys.exit(1)
+
+    with span('normalize'):
+        add_team_keys(predictions)
+        add_team_keys(results)
+    with span('backtest'):
+        settled, unplayed = settle(predictions, results)
+        cumulative = cumulative_sums(settled)
+        bands = [parse_band(band) for band in (args.band or DEFAULT_BANDS)]
+        thresholds = threshold_table(cumulative, parse_thresholds(args.thresholds))
+        band_results = band_table(cumulative, bands)
+        calibration = calibration_table(settled, args.bucket)
+    count('predictions_settled', len(settled))
+    count('predictions_unplayed', unplayed)
+
+    dates = predictions['Date']
+    print(f"Loaded {len(predictions)} predictions from {len(snapshots)} snapshot(s), "
+          f"{dates.min()} to {dates.max()}")
+    print(f"Settled {len(settled)} against {len(results)} results "
+          f"({len(predictions) - len(settled) - unplayed} without a result)")
+    if unplayed:
+        print(f"  Skipped {unplayed} prediction(s) whose result has no final score (blank goals)")
+    if settled.empty:
+        print("Nothing to evaluate: no prediction matched a result (check dates and team names)")
+        sys.exit(1)
+    if settled['Odds'].isna().all():
+        print("  No odds in the results file; ROI columns are empty")
+
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print("\n=== THRESHOLDS ===")
+        print(thresholds.to_string(index=False))
+        print("\n=== BANDS ===")
+        print(band_results.to_string(index=False))
+        print("\n=== CALIBRATION ===")
+        print(calibration.to_string(index=False))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with span('export'), pd.ExcelWriter(args.output, engine='openpyxl') as writer:
+        thresholds.to_excel(writer, index=False, sheet_name='Thresholds')
+        band_results.to_excel(writer, index=False, sheet_name='Bands')
+        calibration.to_excel(writer, index=False, sheet_name='Calibration')
+    print(f"\nSaved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
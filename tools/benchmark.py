@@ -0,0 +1,317 @@
+"""
+Synthetic-data benchmark for the parse and match stages.
+
+Generates realistic SoccerVista and SportyBet markdown at several multiples of
+a normal day (1x = ~80 SoccerVista leagues / ~300 fixtures, ~384 SportyBet
+sidebar leagues, ~8 detail leagues), then times each stage:
+
+  parse_matches              SoccerVista markdown -> match records
+  parse_sportybet_page       SportyBet page -> sidebar league + game records
+  match_games                league + team matching (match_predictions)
+
+For each stage and scale it records wall time, throughput (rows/sec) and peak
+traced memory, and saves everything as JSON so runs on different commits can
+be compared.
+
+Usage:
+  python3 tools/benchmark.py [--scales 1 10 100 1000] [--match-max-scale 100]
+      [--repeat 3] [--no-memory] [--seed 42] [--output PATH]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from parse_soccervista import parse_matches, records_to_frame
+from parse_sportybet import parse_sportybet_page
+from match_games import add_normalized_columns, match_predictions
+
+# Shape of a normal day
+DAY_SV_LEAGUES = 80
+DAY_SV_FIXTURES_PER_LEAGUE = (1, 7)
+DAY_SB_SIDEBAR_LEAGUES = 384
+DAY_SB_DETAIL_LEAGUES = 8
+DAY_SB_GAMES_PER_LEAGUE = (6, 14)
+
+# Matching is quadratic-ish in league count; larger scales are opt-in
+DEFAULT_MATCH_MAX_SCALE = 100
+
+COUNTRIES = [
+    'England', 'Spain', 'Germany', 'Italy', 'France', 'Belgium', 'Netherlands',
+    'Portugal', 'Scotland', 'Northern Ireland', 'Ireland', 'USA', 'Mexico', 'Brazil',
+    'Argentina', 'Turkey', 'Greece', 'Denmark', 'Sweden', 'Norway', 'Poland',
+    'Czech Republic', 'Austria', 'Switzerland', 'Japan', 'Australia', 'Nigeria',
+]
+LEAGUE_NAMES = [
+    'Premier League', 'Championship', 'League One', 'Premier League 2', 'FA Cup',
+    'Serie A', 'Serie B', 'Bundesliga', '2. Bundesliga', 'Pro League',
+    'Challenger Pro League', 'Liga MX, Clausura', 'Liga de Expansion MX, Clausura',
+    'Premiership', 'Premier Division', 'Ligue 1', 'Ligue 2', 'National', 'Cup',
+    'Super League', 'First Division', 'Women', 'U21 League', 'Reserve League',
+]
+CITIES = [
+    'Manchester', 'Leeds', 'Madrid', 'Sevilla', 'Milan', 'Napoli', 'Lyon', 'Porto',
+    'Brugge', 'Genk', 'Glasgow', 'Belfast', 'Dublin', 'Santos', 'Rosario', 'Ankara',
+    'Athens', 'Aarhus', 'Malmo', 'Bergen', 'Krakow', 'Prague', 'Vienna', 'Basel',
+    'Osaka', 'Sydney', 'Lagos', 'Munich', 'Dortmund', 'Hamburg', 'Bremen', 'Lille',
+]
+SUFFIXES = ['United', 'City', 'FC', 'Athletic', 'Rovers', 'Wanderers', 'SC', 'Real', 'Sporting', '']
+
+
+def _team(rng):
+    return f"{rng.choice(CITIES)} {rng.choice(SUFFIXES)}".strip()
+
+
+def _sportybet_spelling(rng, team):
+    """How SportyBet might spell the same team."""
+    variants = [team, team.replace('United', 'Utd'), team.replace(' FC', ''), f"FC {team}"]
+    return rng.choice(variants)
+
+
+def _form(rng):
+    return [rng.choice('WWWDDL') for _ in range(rng.randint(3, 5))]
+
+
+def _form_column(rng, team):
+    form = _form(rng)
+    parts = form + [team] if rng.random() < 0.5 else [team] + form
+    return '[' + '\\<br>\\<br>'.join(parts) + '](https://www.soccervista.com/team/x)'
+
+
+def _region(n):
+    """Letters-only region tag ('A', 'B', ..., 'AA', ...); SportyBet country names carry no digits."""
+    tag = ''
+    while True:
+        n, r = divmod(n, 26)
+        tag = chr(ord('A') + r) + tag
+        if n == 0:
+            return tag
+        n -= 1
+
+
+def generate_fixture_universe(scale, seed):
+    """Leagues and fixtures shared by both sites, so the matcher finds real hits."""
+    rng = random.Random(seed)
+    leagues = []
+    for i in range(DAY_SV_LEAGUES * scale):
+        country = COUNTRIES[i % len(COUNTRIES)]
+        region = i // (len(COUNTRIES) * len(LEAGUE_NAMES))
+        if region:
+            country = f"{country} {_region(region - 1)}"
+        league = LEAGUE_NAMES[(i // len(COUNTRIES)) % len(LEAGUE_NAMES)]
+        fixtures = []
+        for _ in range(rng.randint(*DAY_SV_FIXTURES_PER_LEAGUE)):
+            home, away = _team(rng), _team(rng)
+            kickoff = f"{rng.randint(10, 22):02d}:{rng.choice(['00', '15', '30', '45'])}"
+            fixtures.append((home, away, kickoff))
+        leagues.append((country, league, fixtures))
+    return leagues
+
+
+def generate_soccervista_markdown(universe, seed):
+    """SoccerVista page markdown: headers, 1X2 rows, legacy '10 on XXX' rows, FT/live rows."""
+    rng = random.Random(seed)
+    lines = ['# Football predictions', '']
+    for country, league, fixtures in universe:
+        slug = country.lower().replace(' ', '-')
+        if rng.random() < 0.9:
+            title = f"{country}: {league}"
+        else:
+            title = league  # header without "Country:" prefix, country comes from URL slug
+        lines.append(f"| ![Country flag](https://www.soccervista.com/flags/{slug}.png) "
+                     f"[{title}](https://www.soccervista.com/{slug}/league/) | | | |")
+        lines.append('| --- | --- | --- | --- |')
+        for home, away, kickoff in fixtures:
+            status = rng.random()
+            if status < 0.08:
+                time_col = '[FT](https://www.soccervista.com/m)'
+            elif status < 0.12:
+                time_col = f"[{rng.randint(1, 90)}']"
+            else:
+                time_col = f"[{kickoff}](https://www.soccervista.com/m)"
+            if rng.random() < 0.25:
+                pred = f"10 on {rng.choice([home, away])[:3].upper()}"
+            else:
+                pred = f"[{rng.choice('112X2')}](https://www.soccervista.com/p)"
+            odds = f"[{rng.uniform(1.2, 4.5):.2f}](https://www.soccervista.com/o)"
+            lines.append(f"| {time_col} | {_form_column(rng, home)} | {_form_column(rng, away)} "
+                         f"| {pred} | {odds} | [View details](https://www.soccervista.com/d) |")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_sportybet_markdown(universe, scale, seed):
+    """SportyBet page markdown: sidebar country/league blocks plus match detail blocks."""
+    rng = random.Random(seed)
+    lines = ['# Football', '- Odds Filter3', '- A-Z12', '']
+
+    by_country = {}
+    for country, league, fixtures in universe:
+        by_country.setdefault(country, []).append((league, fixtures))
+    # Pad the sidebar with leagues SoccerVista does not cover
+    extra = max(0, DAY_SB_SIDEBAR_LEAGUES * scale - len(universe))
+    for i in range(extra):
+        country = rng.choice(list(by_country))
+        by_country[country].append((f"Regional League {i}", []))
+
+    for country, leagues in by_country.items():
+        total = sum(len(fixtures) or 1 for _, fixtures in leagues)
+        lines.append(f"- {country}{total}")
+        for league, fixtures in leagues:
+            lines.append(f"  - {league}({len(fixtures) or 1})")
+    lines.append('10 options is the maximum allowed')
+    lines.append('Popular')
+
+    detail = rng.sample(universe, min(len(universe), DAY_SB_DETAIL_LEAGUES * scale))
+    for country, league, fixtures in detail:
+        lines.append(f"__{country} {league}")
+        lines.append('21/02 Saturday')
+        games = list(fixtures)
+        while len(games) < rng.randint(*DAY_SB_GAMES_PER_LEAGUE):
+            games.append((_team(rng), _team(rng), f"{rng.randint(10, 22):02d}:00"))
+        for home, away, kickoff in games:
+            lines += [
+                kickoff, '', f"ID: {rng.randint(10000, 99999)}",
+                _sportybet_spelling(rng, home), _sportybet_spelling(rng, away),
+                f"{rng.uniform(1.2, 4.5):.2f}", f"{rng.uniform(2.8, 3.6):.2f}", f"{rng.uniform(1.2, 6):.2f}",
+            ]
+        lines.append('View All')
+    return '\n'.join(lines)
+
+
+def measure(fn, repeat, track_memory):
+    """Run fn repeat times; return (result, best wall seconds, best cpu seconds, peak bytes)."""
+    best_wall = best_cpu = float('inf')
+    result = None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+
+    peak = None
+    if track_memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, best_wall, best_cpu, peak
+
+
+def stage_record(stage, scale, rows, input_bytes, wall, cpu, peak):
+    return {
+        'stage': stage,
+        'scale': scale,
+        'rows': rows,
+        'input_bytes': input_bytes,
+        'wall_seconds': round(wall, 6),
+        'cpu_seconds': round(cpu, 6),
+        'rows_per_sec': round(rows / wall, 1) if wall > 0 else None,
+        'peak_memory_bytes': peak,
+    }
+
+
+def run_scale(scale, seed, repeat, track_memory, run_match, workdir):
+    """Generate one scale's inputs and benchmark every stage on them."""
+    universe = generate_fixture_universe(scale, seed)
+    sv_path = os.path.join(workdir, f"soccervista_{scale}x.md")
+    sb_path = os.path.join(workdir, f"sportybet_{scale}x.md")
+    with open(sv_path, 'w', encoding='utf-8') as f:
+        f.write(generate_soccervista_markdown(universe, seed + 1))
+    sb_content = generate_sportybet_markdown(universe, scale, seed + 2)
+    with open(sb_path, 'w', encoding='utf-8') as f:
+        f.write(sb_content)
+    sv_bytes, sb_bytes = os.path.getsize(sv_path), os.path.getsize(sb_path)
+
+    records = []
+
+    sv_matches, wall, cpu, peak = measure(lambda: parse_matches(sv_path), repeat, track_memory)
+    records.append(stage_record('parse_matches', scale, len(sv_matches), sv_bytes, wall, cpu, peak))
+
+    (sidebar, games), wall, cpu, peak = measure(lambda: parse_sportybet_page(sb_path), repeat, track_memory)
+    records.append(stage_record('parse_sportybet_page', scale, len(sidebar) + len(games), sb_bytes,
+                                wall, cpu, peak))
+
+    if run_match:
+        sv_df = records_to_frame(sv_matches)
+        sv_df = sv_df[sv_df['Win Probability %'] >= 60].sort_values('Win Probability %', ascending=False)
+
+        def match_stage():
+            sidebar_leagues = add_normalized_columns(pd.DataFrame(sidebar)).to_dict('records')
+            sb_games_df = add_normalized_columns(pd.DataFrame(games))
+            return match_predictions(sv_df, sidebar_leagues, sb_games_df, verbose=False)
+
+        result, wall, cpu, peak = measure(match_stage, repeat, track_memory)
+        record = stage_record('match_games', scale, len(sv_df), sv_bytes + sb_bytes, wall, cpu, peak)
+        record['matched'] = len(result['matched'])
+        records.append(record)
+
+    return records
+
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout."""
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parse and match stages")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--match-max-scale', type=int, default=DEFAULT_MATCH_MAX_SCALE,
+                        help="Largest scale at which the match stage is run")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak-memory run")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Results JSON path (default: .tmp/benchmarks/<commit>_<time>.json)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    results = {
+        'commit': commit,
+        'started_at': started.isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'stages': [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            print(f"\n=== {scale}x ===")
+            records = run_scale(scale, args.seed, args.repeat, not args.no_memory,
+                                scale <= args.match_max_scale, workdir)
+            for r in records:
+                peak = f"{r['peak_memory_bytes'] / 1e6:8.1f} MB" if r['peak_memory_bytes'] is not None else '       -'
+                print(f"  {r['stage']:26s} {r['rows']:>9d} rows  {r['wall_seconds']:9.3f}s  "
+                      f"{r['rows_per_sec'] or 0:>12.0f} rows/s  {peak}")
+            results['stages'].extend(records)
+
+    output = args.output or os.path.join(
+        '.tmp', 'benchmarks', f"{commit or 'nocommit'}_{started.strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,108 @@
 """
 Combine soccervista predictions from multiple days.
 Filter 60-70% win probability and output top 20 to Excel.
+
+Snapshots are discovered from paths, directories or glob patterns (default:
+.tmp/soccervista_*.md), parsed in parallel, and fixtures listed in more than
+one snapshot are kept once (from the most recently scraped snapshot).
+
+The date of each snapshot is inferred from its file name:
+  soccervista_2026-02-12.md   -> that date
+  soccervista_tomorrow.md     -> day after the file was scraped
+  soccervista_thursday.md     -> next Thursday on/after the scrape date
+  anything else (e.g. _raw)   -> the day the file was scraped (mtime)
+
+The scrape day is taken in UTC, the time zone SoccerVista lists kickoffs in.
+
+Usage:
+  python3 tools/combine_predictions.py [PATH | DIR | GLOB ...]
 """
 
-import pandas as pd
-from parse_soccervista import parse_matches
-import sys
+import glob
 import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 
-sys.path.insert(0, os.path.dirname(__file__))
+import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from metrics import count, instrumented, span
+from parse_soccervista import parse_matches, records_to_frame
 
-def main():
-    base_dir = os.path.join(os.path.dirname(__file__), '..', '.tmp')
+DEFAULT_SNAPSHOTS = '.tmp/soccervista_*.md'
 
-    files_with_dates = [
-        ('.tmp/soccervista_raw.md', 'Tue, 10 Feb'),
-        ('.tmp/soccervista_tomorrow.md', 'Wed, 11 Feb'),
-        ('.tmp/soccervista_thursday.md', 'Thu, 12 Feb'),
-    ]
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
 
-    all_matches = []
-    for filepath, date_label in files_with_dates:
-        matches = parse_matches(filepath)
-        for m in matches:
-            m['Match Date'] = date_label
-        all_matches.extend(matches)
-        print(f"{date_label}: {len(matches)} matches parsed")
+# A fixture listed in several snapshots is the same game
+FIXTURE_KEY = ['Country', 'League', 'Home Team', 'Away Team', 'Kickoff (UTC)']
 
-    print(f"\nTotal matches across all days: {len(all_matches)}")
 
-    df = pd.DataFrame(all_matches)
+def discover_snapshots(patterns):
+    """Expand paths, directories and glob patterns into a sorted list of snapshot files."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, 'soccervista_*.md')
+        paths.update(p for p in glob.glob(pattern) if os.path.isfile(p))
+    return sorted(paths)
+
+
+def infer_snapshot_date(path):
+    """Infer the match day a SoccerVista snapshot covers from its file name."""
+    scraped = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).date()
+    name = os.path.basename(path).lower()
+
+    explicit = re.search(r'(\d{4})-(\d{2})-(\d{2})', name)
+    if explicit:
+        return date(*map(int, explicit.groups()))
+    if 'tomorrow' in name:
+        return scraped + timedelta(days=1)
+    for weekday, day_name in enumerate(WEEKDAYS):
+        if day_name in name:
+            return scraped + timedelta(days=(weekday - scraped.weekday()) % 7)
+    return scraped
+
+
+def parse_snapshot(path):
+    """Parse one snapshot and return (inferred date label, MatchRecords) (runs in a worker)."""
+    date_label = infer_snapshot_date(path).strftime('%a, %d %b')
+    return date_label, parse_matches(path)
+
+
+@instrumented('combine_predictions')
+def main():
+    patterns = sys.argv[1:] or [DEFAULT_SNAPSHOTS]
+    snapshots = discover_snapshots(patterns)
+    if not snapshots:
+        print(f"No SoccerVista snapshots found for: {' '.join(patterns)}")
+        sys.exit(1)
+
+    # Oldest scrape first, so the freshest copy of a duplicated fixture wins below
+    snapshots.sort(key=os.path.getmtime)
+
+    # Workers keep their own counters, so rows are counted here
+    all_matches = []
+    match_dates = []
+    with span('parse'), ProcessPoolExecutor() as pool:
+        for path, (date_label, matches) in zip(snapshots, pool.map(parse_snapshot, snapshots)):
+            all_matches.extend(matches)
+            match_dates.extend([date_label] * len(matches))
+            print(f"{date_label} ({os.path.basename(path)}): {len(matches)} matches parsed")
+    count('snapshots_parsed', len(snapshots))
+    count('rows_parsed', len(all_matches))
+
+    if not all_matches:
+        print("No matches found!")
+        return
+
+    df = records_to_frame(all_matches)
+    df['Match Date'] = match_dates
+    before = len(df)
+    df = df.drop_duplicates(subset=FIXTURE_KEY, keep='last')
+    print(f"\nRemoved {before - len(df)} fixtures listed in more than one snapshot")
+    print(f"Total matches across all days: {len(df)}")
 
     # Filter 60-70% range
     filtered = df[(df['Win Probability %'] >= 60) & (df['Win Probability %'] <= 70)].copy()
@@ -72,7 +144,7 @@ def main():
 
     # Save to Excel with formatting
     output_path = '.tmp/soccervista_top20.xlsx'
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+    with span('export'), pd.ExcelWriter(output_path, engine='openpyxl') as writer:
         top20.to_excel(writer, index=False, sheet_name='Top 20 (60-70% Win)')
 
         # Auto-fit column widths
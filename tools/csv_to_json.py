@@ -1,64 +1,287 @@
 """
-Convert matched_predictions.csv to predictions.json for the website.
+Convert matched predictions to predictions.json for the website.
 Bridge between the prediction pipeline output and the WebPage frontend.
+
+Reads the typed .tmp/matched_predictions.arrow table written by match_games.py
+by default; a matched_predictions.csv export is still accepted.
+
+With --shard-dir, the predictions are also written as compact JSON shards so
+clients can fetch only what they show:
+
+  <dir>/manifest.json            counts, sizes and sha256 (usable as an ETag) of every shard
+  <dir>/all.json                 every prediction
+  <dir>/top-5.json, top-10.json, top-20.json
+  <dir>/date/<YYYY-MM-DD>.json   one per match date (the "Match Date" column)
+  <dir>/league/<country>--<league>.json
+
+Every file has precompressed .gz and .br siblings. The .br files need the
+brotli package; without it they are skipped with a warning. Shards whose
+content has not changed are left untouched, and shards that are no longer in
+the manifest are removed. The manifest is written last.
+
+Usage:
+  python3 tools/csv_to_json.py [input] [output.json] [--shard-dir DIR]
 """
 
+import argparse
+import gzip
+import hashlib
 import json
 import os
+import re
 import sys
+import unicodedata
 from datetime import datetime, timezone
 
 import pandas as pd
 
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped
+    brotli = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from metrics import count, instrumented, span
+from tables import TABLE_EXTENSION, read_table, table_path
+
+WEBSITE_JSON = 'website/public/data/predictions.json'
+WEBSITE_SHARD_DIR = 'website/public/data/predictions'
+MANIFEST = 'manifest.json'
+# Top-N shards, matching the frontend's filter buttons
+TOP_N = (5, 10, 20)
+
+# JSON key -> matched-predictions column for the plain string fields
+TEXT_FIELDS = {
+    'country': 'Country',
+    'league': 'League',
+    'kickoff_utc': 'Kickoff (UTC)',
+    'home_team': 'Home Team',
+    'away_team': 'Away Team',
+    'predicted_winner': 'Predicted Winner',
+    'predicted_side': 'Predicted Side',
+    'winner_form': 'Winner Form (Last 5)',
+    'opponent_form': 'Opponent Form (Last 5)',
+}
+# Columns older exports may lack; these default to ''
+OPTIONAL_COLUMNS = {'Predicted Side', 'Winner Form (Last 5)', 'Opponent Form (Last 5)',
+                    'SportyBet League', 'Match Type'}
+
+
+def load_predictions(path):
+    """Load matched predictions from the typed table or a CSV export."""
+    if path.endswith(TABLE_EXTENSION):
+        return read_table('matched_predictions', path)
+    return pd.read_csv(path)
+
+
+def _column(df, name):
+    if name not in df.columns and name in OPTIONAL_COLUMNS:
+        return [''] * len(df)
+    return df[name].tolist()
 
-def csv_to_json(csv_path, output_path):
-    """Convert matched predictions CSV to web-ready JSON."""
-    df = pd.read_csv(csv_path)
-
-    predictions = []
-    for _, row in df.iterrows():
-        match_type = str(row.get('Match Type', ''))
-        predictions.append({
-            'rank': int(row['Rank']),
-            'country': row['Country'],
-            'league': row['League'],
-            'kickoff_utc': row['Kickoff (UTC)'],
-            'home_team': row['Home Team'],
-            'away_team': row['Away Team'],
-            'predicted_winner': row['Predicted Winner'],
-            'predicted_side': row.get('Predicted Side', ''),
-            'winner_form': row.get('Winner Form (Last 5)', ''),
-            'opponent_form': row.get('Opponent Form (Last 5)', ''),
-            'win_probability': round(float(row['Win Probability %']), 1),
-            'sportybet_league': row.get('SportyBet League', ''),
-            'match_type': match_type,
-            'verified': match_type.startswith('Full'),
-        })
-
-    data = {
+
+def prediction_records(df):
+    """The web records for a ranked matched-predictions DataFrame, built column by column."""
+    match_types = [str(value) for value in _column(df, 'Match Type')]
+    columns = {'rank': [int(value) for value in df['Rank'].tolist()]}
+    columns.update((key, _column(df, column)) for key, column in TEXT_FIELDS.items())
+    columns['win_probability'] = [round(float(value), 1) for value in df['Win Probability %'].tolist()]
+    columns['sportybet_league'] = _column(df, 'SportyBet League')
+    columns['match_type'] = match_types
+    columns['verified'] = [match_type.startswith('Full') for match_type in match_types]
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def predictions_payload(df):
+    """Build the web-ready JSON document from a ranked matched-predictions DataFrame."""
+    predictions = prediction_records(df)
+    return {
         'generated_at': datetime.now(timezone.utc).isoformat(),
         'date': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
         'total_predictions': len(predictions),
         'predictions': predictions,
     }
 
+
+def write_predictions_json(df, output_path):
+    """Write the JSON document for df to output_path atomically. Returns the document."""
+    data = predictions_payload(df)
     os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
+    # Write then rename, so the website never reads a half-written file
+    tmp_path = f"{output_path}.part"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    return data
+
+
+def slugify(text):
+    """Lowercase ASCII file-name slug: 'Côte d'Ivoire' -> 'cote-d-ivoire'."""
+    ascii_text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_text.lower()).strip('-') or 'unknown'
+
+
+def _encode(document):
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _write_bytes(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _encodings():
+    return ['gzip', 'br'] if brotli is not None else ['gzip']
+
+
+def _sibling_paths(path):
+    return [path + ('.gz' if encoding == 'gzip' else '.br') for encoding in _encodings()]
+
+
+def write_shard(shard_dir, relative_path, document):
+    """Write one compact JSON file plus its .gz/.br siblings, unless the content is unchanged.
+
+    Returns (manifest entry, written).
+    """
+    data = _encode(document)
+    entry = {
+        'path': relative_path,
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'bytes': len(data),
+        'encodings': _encodings(),
+    }
+    path = os.path.join(shard_dir, relative_path)
+    if os.path.exists(path) and all(os.path.exists(p) for p in _sibling_paths(path)):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return entry, False
+
+    # Siblings first: a client that sees the new plain file can rely on them
+    # mtime=0 keeps the .gz bytes identical for identical content
+    _write_bytes(f"{path}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_bytes(f"{path}.br", brotli.compress(data, quality=11))
+    _write_bytes(path, data)
+    return entry, True
+
+
+def _manifest_paths(manifest):
+    """Every shard path listed in a manifest."""
+    shards = manifest.get('shards', {})
+    entries = [shards['all']] if 'all' in shards else []
+    entries += list(shards.get('top', {}).values())
+    entries += list(shards.get('dates', {}).values())
+    entries += shards.get('leagues', [])
+    return {entry['path'] for entry in entries}
+
+
+def write_prediction_shards(df, shard_dir, payload=None):
+    """Write the sharded, precompressed predictions and their manifest. Returns the manifest."""
+    payload = payload or predictions_payload(df)
+    predictions = payload['predictions']
+
+    # match_games.py dates every row with its snapshot's day; exports older than that column are today's
+    match_dates = _column(df, 'Match Date') if 'Match Date' in df.columns else [payload['date']] * len(df)
+    by_date = {}
+    for match_date, prediction in zip(match_dates, predictions):
+        by_date.setdefault(str(match_date), []).append(prediction)
+    by_league = {}
+    for prediction in predictions:
+        by_league.setdefault((prediction['country'], prediction['league']), []).append(prediction)
+
+    written = unchanged = 0
+
+    def shard(relative_path, shard_predictions):
+        nonlocal written, unchanged
+        entry, was_written = write_shard(shard_dir, relative_path, {'predictions': shard_predictions})
+        entry['count'] = len(shard_predictions)
+        if was_written:
+            written += 1
+        else:
+            unchanged += 1
+        return entry
+
+    shards = {
+        'all': shard('all.json', predictions),
+        'top': {str(n): shard(f"top-{n}.json", predictions[:n]) for n in TOP_N},
+        'dates': {match_date: shard(f"date/{slugify(match_date)}.json", items)
+                  for match_date, items in sorted(by_date.items())},
+        'leagues': [],
+    }
+    used = set()
+    for (country, league), items in by_league.items():
+        slug = f"{slugify(country)}--{slugify(league)}"
+        # Distinct names can share a slug; keep shard paths unique
+        candidate, n = slug, 2
+        while candidate in used:
+            candidate, n = f"{slug}-{n}", n + 1
+        used.add(candidate)
+        entry = shard(f"league/{candidate}.json", items)
+        shards['leagues'].append(dict({'country': country, 'league': league}, **entry))
+
+    manifest_path = os.path.join(shard_dir, MANIFEST)
+    old_paths = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            old_paths = _manifest_paths(json.load(f))
+
+    manifest = {
+        'generated_at': payload['generated_at'],
+        'date': payload['date'],
+        'total_predictions': payload['total_predictions'],
+        'shards': shards,
+    }
+    write_shard(shard_dir, MANIFEST, manifest)
+
+    # Remove shards the new manifest no longer lists (e.g. a league with no predictions today)
+    removed = 0
+    for relative_path in old_paths - _manifest_paths(manifest):
+        path = os.path.join(shard_dir, relative_path)
+        for stale in [path, f"{path}.gz", f"{path}.br"]:
+            if os.path.exists(stale):
+                os.remove(stale)
+        removed += 1
+
+    count('shards_written', written)
+    count('shards_unchanged', unchanged)
+    print(f"Wrote {written} shard(s), {unchanged} unchanged, {removed} removed -> {shard_dir}/")
+    if brotli is None:
+        print("Warning: the brotli package is not installed, so no .br files were written "
+              "(pip install brotli); clients asking for br get the .gz or plain files")
+    return manifest
+
 
-    print(f"Converted {len(predictions)} predictions -> {output_path}")
+def csv_to_json(csv_path, output_path, shard_dir=None):
+    """Convert matched predictions (table or CSV) to web-ready JSON, optionally also sharded."""
+    df = load_predictions(csv_path)
+    data = write_predictions_json(df, output_path)
+    print(f"Converted {data['total_predictions']} predictions -> {output_path}")
+    if shard_dir:
+        write_prediction_shards(df, shard_dir, data)
     return data
 
 
+@instrumented('csv_to_json')
 def main():
-    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'matched_predictions.csv'
-    output_path = sys.argv[2] if len(sys.argv) > 2 else 'website/public/data/predictions.json'
+    parser = argparse.ArgumentParser(description="Convert matched predictions to the website JSON")
+    parser.add_argument('input', nargs='?', default=table_path('matched_predictions'),
+                        help="Matched predictions table (.arrow) or CSV export")
+    parser.add_argument('output', nargs='?', default=WEBSITE_JSON, help="predictions.json to write")
+    parser.add_argument('--shard-dir', help=f"Also write sharded, precompressed JSON here "
+                                            f"(the website uses {WEBSITE_SHARD_DIR})")
+    args = parser.parse_args()
 
-    if not os.path.exists(csv_path):
-        print(f"Error: {csv_path} not found. Run the prediction pipeline first.")
+    if not os.path.exists(args.input):
+        print(f"Error: {args.input} not found. Run the prediction pipeline first.")
         sys.exit(1)
 
-    csv_to_json(csv_path, output_path)
+    with span('export'):
+        data = csv_to_json(args.input, args.output, args.shard_dir)
+    count('rows_exported', data['total_predictions'])
 
 
 if __name__ == "__main__":
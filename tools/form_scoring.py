@@ -0,0 +1,112 @@
+"""
+Vectorized form encoding and win-probability scoring.
+
+Form lists (['W', 'D', 'L', ...]) are packed into bytes for compact per-record
+storage, and for scoring they are encoded as a fixed-width int8 matrix,
+one row per team, right-aligned so the last (most recent) result of every row
+sits in the last column. Empty slots on the left hold PAD, and `codes >= 0`
+is the length mask.
+
+On top of that encoding, the win probabilities of every parsed match come
+out of a handful of NumPy operations instead of a Python loop per match.
+With the default (uniform) weights the result is identical to
+parse_soccervista.calculate_win_probability. Pass per-slot weights, e.g.
+recency_weights(), to score alternative models over large historical sets.
+"""
+
+import numpy as np
+
+# Result codes; a result's code is also its index into POINTS
+LOSS, DRAW, WIN = 0, 1, 2
+PAD = -1
+FORM_CODES = {'L': LOSS, 'D': DRAW, 'W': WIN}
+POINTS = np.array([0, 1, 3], dtype=np.int64)
+MAX_POINTS = 3
+
+# Byte value -> result code, PAD for anything that is not W/D/L
+_LETTER_CODES = np.full(256, PAD, dtype=np.int8)
+for _letter, _code in FORM_CODES.items():
+    _LETTER_CODES[ord(_letter)] = _code
+
+
+_RESULT_LETTERS = 'LDW'
+# Packed code byte -> ASCII letter, for bytes.translate
+_PACKED_TO_LETTERS = bytes(range(256)).replace(b'\x00\x01\x02', _RESULT_LETTERS.encode('ascii'))
+
+
+def pack_form(form):
+    """Pack one form list into bytes, one result code per byte (compact per-record storage)."""
+    return bytes(FORM_CODES[r] for r in form)
+
+
+def unpack_form(packed):
+    """Inverse of pack_form: the W/D/L list."""
+    return [_RESULT_LETTERS[code] for code in packed]
+
+
+def encode_forms(forms, width=None):
+    """Encode forms as an (n, width) int8 matrix, right-aligned and PAD-filled.
+
+    Each form may be a W/D/L list, a 'WDL' string or packed bytes (pack_form).
+    width defaults to the longest form; longer forms keep their last `width`
+    results. Raises ValueError on anything other than W/D/L.
+    """
+    joined = [
+        form.translate(_PACKED_TO_LETTERS).decode('latin-1') if isinstance(form, bytes) else ''.join(form)
+        for form in forms
+    ]
+    lengths = np.fromiter(map(len, joined), dtype=np.int64, count=len(joined))
+    if width is None:
+        width = int(lengths.max()) if len(lengths) else 0
+    codes = np.full((len(joined), width), PAD, dtype=np.int8)
+
+    flat = _LETTER_CODES[np.frombuffer(''.join(joined).encode('latin-1', 'replace'), dtype=np.uint8)]
+    if (flat < 0).any():
+        raise ValueError("form results must be 'W', 'D' or 'L'")
+
+    # Row and right-aligned column of every result in the flattened forms
+    rows = np.repeat(np.arange(len(joined)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    columns = np.arange(len(flat)) - np.repeat(starts, lengths) + np.repeat(width - lengths, lengths)
+    keep = columns >= 0
+    codes[rows[keep], columns[keep]] = flat[keep]
+    return codes
+
+
+def form_strength(codes, weights=None):
+    """Points share per row: sum(weight * points) / sum(weight * 3) over played slots.
+
+    weights is an optional per-column array (same width as codes); rows with
+    no results get strength 0.
+    """
+    mask = codes >= 0
+    points = np.where(mask, POINTS[np.where(mask, codes, 0)], 0)
+    if weights is None:
+        earned = points.sum(axis=1)
+        available = mask.sum(axis=1) * MAX_POINTS
+    else:
+        weights = np.asarray(weights, dtype=np.float64)
+        earned = (points * weights).sum(axis=1)
+        available = (mask * weights).sum(axis=1) * MAX_POINTS
+    strength = np.zeros(len(codes), dtype=np.float64)
+    np.divide(earned, available, out=strength, where=available > 0)
+    return strength
+
+
+def recency_weights(width, decay=0.8):
+    """Per-column weights for right-aligned codes: 1 for the latest result, decay**k k results back."""
+    return decay ** np.arange(width - 1, -1, -1, dtype=np.float64)
+
+
+def win_probabilities(team_codes, opponent_codes, team_weights=None, opponent_weights=None):
+    """Win probability (%) per row: (team_strength + (1 - opponent_strength)) / 2 * 100.
+
+    Rows where either side has no form get 0.0, like calculate_win_probability.
+    Results are rounded to one decimal.
+    """
+    team_strength = form_strength(team_codes, team_weights)
+    opponent_strength = form_strength(opponent_codes, opponent_weights)
+    prob = np.round((team_strength + (1 - opponent_strength)) / 2 * 100, 1)
+    has_form = (team_codes >= 0).any(axis=1) & (opponent_codes >= 0).any(axis=1)
+    return np.where(has_form, prob, 0.0)
+
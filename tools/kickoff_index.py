@@ -0,0 +1,150 @@
+"""
+Kickoff-time blocking for SportyBet game candidates.
+
+SoccerVista lists kickoffs in UTC ("Kickoff (UTC)", HH:MM). SportyBet lists a
+local kickoff (sb_kickoff, HH:MM) under a date header (sb_date, DD/MM). Both
+are converted to minutes on one UTC axis, measured from midnight of the
+SoccerVista match date:
+
+  SoccerVista  HH:MM                      -> minutes into the match date
+  SportyBet    DD/MM HH:MM at UTC+offset  -> minutes from that same midnight
+               (the year is the one that puts DD/MM closest to the match date)
+
+Without a match date, both sides are reduced to minutes of the day and
+compared around the clock, so 23:30 and 00:15 are 45 minutes apart.
+
+The index keeps the known SportyBet kickoffs sorted, so the games within
++/- tolerance of a fixture's kickoff are found with two binary searches.
+Games without a kickoff, and fixtures without one, are never filtered out.
+"""
+
+from datetime import date
+
+import numpy as np
+
+# sportybet.com/ng shows West Africa Time (UTC+1)
+DEFAULT_SPORTYBET_UTC_OFFSET = 1
+# Wide enough to absorb a one-hour offset error (e.g. a page rendered in UTC),
+# narrow enough to separate other time slots and other rounds
+DEFAULT_TOLERANCE_MINUTES = 90
+MINUTES_PER_DAY = 24 * 60
+
+
+def clock_minutes(text):
+    """'18:30' -> 1110; None for anything that is not HH:MM."""
+    try:
+        hours, minutes = str(text).strip().split(':')
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+
+def _nearest_date(day, month, match_date):
+    """The date with this day and month closest to match_date, or None if it never exists."""
+    candidates = []
+    for year in (match_date.year - 1, match_date.year, match_date.year + 1):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:
+            continue
+    return min(candidates, key=lambda d: abs(d - match_date)) if candidates else None
+
+
+def sportybet_minutes(sb_dates, sb_kickoffs, utc_offset=DEFAULT_SPORTYBET_UTC_OFFSET, match_date=None):
+    """UTC kickoff minutes of SportyBet games (NaN where unknown), see the module docstring."""
+    minutes = np.full(len(sb_kickoffs), np.nan)
+    # Distinct (date, kickoff) pairs are few: a page lists a handful of days and time slots
+    memo = {}
+    for position, key in enumerate(zip(sb_dates, sb_kickoffs)):
+        if key not in memo:
+            memo[key] = _sportybet_minute(key[0], key[1], utc_offset, match_date)
+        minutes[position] = memo[key]
+    return minutes
+
+
+def _sportybet_minute(sb_date, sb_kickoff, utc_offset, match_date):
+    local = clock_minutes(sb_kickoff)
+    if local is None:
+        return np.nan
+    utc = local - utc_offset * 60
+    if match_date is None:
+        return utc % MINUTES_PER_DAY
+    try:
+        day, month = (int(part) for part in str(sb_date).split('/'))
+    except ValueError:
+        return np.nan
+    game_date = _nearest_date(day, month, match_date)
+    if game_date is None:
+        return np.nan
+    return (game_date - match_date).days * MINUTES_PER_DAY + utc
+
+
+def soccervista_minute(kickoff):
+    """UTC minutes into the match date of a SoccerVista kickoff, or None."""
+    return clock_minutes(kickoff)
+
+
+def build_kickoff_index(minutes, circular=False):
+    """Index game kickoff minutes (NaN = unknown); game i is position i.
+
+    circular means minutes are minutes of the day (no match date).
+    """
+    minutes = np.asarray(minutes, dtype=np.float64)
+    known = ~np.isnan(minutes)
+    positions = np.flatnonzero(known)
+    order = np.argsort(minutes[positions], kind='stable')
+    return {
+        'minutes': minutes[positions][order],
+        'positions': positions[order],
+        'unknown': np.flatnonzero(~known),
+        'size': len(minutes),
+        'circular': circular,
+    }
+
+
+def games_in_window(index, minute, tolerance=DEFAULT_TOLERANCE_MINUTES):
+    """Sorted positions of the games within +/- tolerance minutes of `minute`.
+
+    Games with an unknown kickoff are always included; a fixture with an
+    unknown kickoff (minute None) gets every game.
+    """
+    if minute is None:
+        return np.arange(index['size'])
+    shifts = (-MINUTES_PER_DAY, 0, MINUTES_PER_DAY) if index['circular'] else (0,)
+    parts = [index['unknown']]
+    for shift in shifts:
+        low = np.searchsorted(index['minutes'], minute + shift - tolerance, side='left')
+        high = np.searchsorted(index['minutes'], minute + shift + tolerance, side='right')
+        parts.append(index['positions'][low:high])
+    return np.unique(np.concatenate(parts))
+
+
+def window_coverage(sb_minutes, sv_kickoffs, tolerance=DEFAULT_TOLERANCE_MINUTES, circular=False):
+    """How many games with a known kickoff fall in at least one fixture's window.
+
+    Returns (games in some window, games with a known kickoff). Zero of many
+    usually means a wrong match date or UTC offset rather than no games.
+    """
+    index = build_kickoff_index(sb_minutes, circular)
+    covered = set()
+    for minute in {soccervista_minute(kickoff) for kickoff in sv_kickoffs} - {None}:
+        covered.update(games_in_window(index, minute, tolerance).tolist())
+    covered.difference_update(index['unknown'].tolist())
+    return len(covered), len(index['positions'])
+
+
+def kickoff_window(tolerance=DEFAULT_TOLERANCE_MINUTES, utc_offset=DEFAULT_SPORTYBET_UTC_OFFSET,
+                   match_date=None):
+    """Kickoff blocking settings as passed to match_games.match_predictions."""
+    return {'tolerance': tolerance, 'utc_offset': utc_offset, 'match_date': match_date}
+
+
+def describe_window(window):
+    """One-line summary of kickoff blocking settings, for tool output."""
+    match_date = window['match_date']
+    anchor = f"match date {match_date.isoformat()}" if match_date else "time of day only"
+    return (f"+/-{window['tolerance']:g} min around each kickoff "
+            f"(SportyBet at UTC{window['utc_offset']:+g}, {anchor})")
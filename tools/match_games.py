@@ -8,18 +8,81 @@ Two-tier matching:
 
 If a league is found on SportyBet but match details aren't scraped for it,
 the game is still included (marked as "league only" match).
+
+Accepted league and team resolutions are remembered in the alias store
+(.tmp/aliases.db, see alias_store.py), so names seen on earlier runs skip
+fuzzy matching.
+
+Fuzzy team matching only considers SportyBet games whose kickoff is within
+a window of the SoccerVista kickoff (default +/-90 minutes, SportyBet times at
+UTC+1, on the SoccerVista snapshot's date; see kickoff_index.py). Games in
+other rounds or time slots are therefore neither scored nor matched by
+mistake. Verbatim and alias team matches are not filtered. A parsed .arrow
+table is dated from --snapshot (the raw snapshot it was parsed from), since
+its own mtime is the parse time; --date overrides both. A warning is printed
+when no SportyBet game falls inside any window.
+
+With --workers N, the predictions are split by country and matched in N
+processes (see match_predictions_parallel); the output is the same as a
+serial run.
+
+With --cross-league, fixtures that did not get a team match (league not
+found, no match details for it, or teams not found in its detail league)
+are looked up across every scraped SportyBet game through a trigram index
+(team_index.py). Each team must score CROSS_LEAGUE_THRESHOLD on its own,
+and such rows are marked "Team only (cross-league match, verify league)".
+
+Usage:
+  python3 tools/match_games.py [soccervista.md | soccervista_matches.arrow] [sportybet_games.arrow]
+      [--cross-league] [--kickoff-tolerance MINUTES] [--sportybet-utc-offset HOURS]
+      [--date YYYY-MM-DD] [--snapshot soccervista_raw.md] [--no-kickoff-filter] [--workers N]
 """
 
+import argparse
+import io
+import math
 import re
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-from thefuzz import fuzz
+from rapidfuzz import fuzz as rf_fuzz, process
+from thefuzz import fuzz, utils as fuzz_utils
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from alias_store import (
+    DEFAULT_ALIAS_DB, open_store, open_store_readonly, lookup_league, record_league, lookup_team,
+    record_team, touch_league, touch_team,
+)
+from metrics import count, instrumented, reset, snapshot, span
+from tables import TABLE_EXTENSION, read_table, table_path, write_table
+from kickoff_index import (
+    DEFAULT_SPORTYBET_UTC_OFFSET, DEFAULT_TOLERANCE_MINUTES, build_kickoff_index, describe_window,
+    games_in_window, kickoff_window, soccervista_minute, sportybet_minutes, window_coverage,
+)
+from team_index import DEFAULT_TOP_K, build_team_index, candidate_games
 
 # Thresholds for fuzzy matching (0-100 scale)
 LEAGUE_THRESHOLD = 65
 TEAM_THRESHOLD = 70
 
+# Cross-league team matches have no league behind them: each team must reach this alone
+CROSS_LEAGUE_THRESHOLD = 85
+# Match Type of cross-league rows; not "Full", so exports treat them as unverified
+CROSS_LEAGUE_MATCH_TYPE = 'Team only (cross-league match, verify league)'
+
+# League names marking women's/youth/reserve competitions
+SPECIAL_LEAGUE_WORDS = ['women', 'u18', 'u19', 'u21', 'u23', 'reserve', 'amateur']
+# Lowest single-team score that can still reach TEAM_THRESHOLD with a perfect other team
+TEAM_SIDE_FLOOR = 2 * TEAM_THRESHOLD - 100
+
+# Parallel mode: shards per worker process, so one big country cannot leave the others idle
+SHARDS_PER_WORKER = 4
+
 # Common abbreviation expansions for normalization
 ABBREVIATIONS = {
     'utd': 'united',
@@ -35,64 +98,224 @@ ABBREVIATIONS = {
 }
 
 
+# Bound on distinct names kept by the normalize() cache
+NORMALIZE_CACHE_SIZE = 16384
+
+# Name columns that get a precomputed '<column>_norm' companion on load
+NORMALIZED_COLUMNS = {
+    'sb_country': 'sb_country_norm',
+    'sb_league_name': 'sb_league_name_norm',
+    'sb_full_league': 'sb_full_league_norm',
+    'sb_league': 'sb_league_norm',
+    'sb_home_team': 'sb_home_team_norm',
+    'sb_away_team': 'sb_away_team_norm',
+}
+
+# Columns match_predictions adds to each matched SoccerVista row
+MATCH_COLUMNS = [
+    'SportyBet League', 'SportyBet Home', 'SportyBet Away',
+    'League Match %', 'Team Match %', 'Match Type',
+]
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize(name):
     """Normalize a team/league name for fuzzy comparison."""
     name = name.lower().strip()
-    name = re.sub(r'[^\w\s]', '', name)  # Remove punctuation
-    name = re.sub(r'\s+', ' ', name)     # Collapse whitespace
+    name = _PUNCTUATION_RE.sub('', name)    # Remove punctuation
+    name = _WHITESPACE_RE.sub(' ', name)    # Collapse whitespace
     words = name.split()
     words = [ABBREVIATIONS.get(w, w) for w in words]
     return ' '.join(w for w in words if w).strip()
 
 
-def match_league_sidebar(sv_country, sv_league, sidebar_leagues):
-    """Match a SoccerVista league against SportyBet's sidebar league list.
+def add_normalized_columns(df):
+    """Add a precomputed '<column>_norm' column for every known name column in df.
 
-    sidebar_leagues is a list of dicts with 'sb_country', 'sb_league_name', 'sb_full_league'.
+    Each distinct name is normalized once, so later lookups read the stored
+    form instead of re-normalizing inside the matching loops.
     """
-    sv_league_norm = normalize(sv_league)
-    sv_country_norm = normalize(sv_country)
+    for column, norm_column in NORMALIZED_COLUMNS.items():
+        if column in df.columns and norm_column not in df.columns:
+            df[norm_column] = df[column].map(normalize)
+    return df
 
-    best_score = 0
-    best_match = None
 
-    for sl in sidebar_leagues:
-        sb_country_norm = normalize(sl['sb_country'])
-        sb_league_norm = normalize(sl['sb_league_name'])
+def normalized_column(df, column):
+    """Return the normalized values of df[column] as a list, preferring the precomputed column."""
+    norm_column = NORMALIZED_COLUMNS[column]
+    if norm_column in df.columns:
+        return df[norm_column].tolist()
+    return [normalize(name) for name in df[column]]
+
+
+def normalized(record, column):
+    """Return the normalized value of record[column], preferring the precomputed field."""
+    value = record.get(NORMALIZED_COLUMNS[column])
+    if value is None:
+        value = normalize(record[column])
+    return value
+
+
+def build_league_index(sidebar_leagues):
+    """Group SportyBet sidebar leagues into buckets keyed by normalized country.
+
+    A lookup then only scores leagues from the country buckets that pass the
+    country gate, instead of every sidebar league. Returns a dict with:
+      'buckets':    normalized country -> [(position, league_norm, sidebar entry)]
+      'candidates': memo of normalized SoccerVista country -> gated candidates
+      'exact':      (normalized country, normalized league) -> first sidebar entry
+    """
+    buckets = {}
+    exact = {}
+    for position, sl in enumerate(sidebar_leagues):
+        sb_country_norm = normalized(sl, 'sb_country')
+        sb_league_norm = normalized(sl, 'sb_league_name')
+        buckets.setdefault(sb_country_norm, []).append((position, sb_league_norm, sl))
+        if sb_country_norm and sb_league_norm:
+            exact.setdefault((sb_country_norm, sb_league_norm), sl)
+    return {'buckets': buckets, 'candidates': {}, 'exact': exact}
 
+
+def match_league_exact(sv_country, sv_league, league_index):
+    """Return the sidebar league whose normalized (country, league) key equals the
+    SoccerVista one, or None. An exact key scores 100, the fuzzy maximum."""
+    return league_index['exact'].get((normalize(sv_country), normalize(sv_league)))
+
+
+def country_candidates(league_index, sv_country_norm):
+    """Return the sidebar leagues whose country passes the gate for sv_country_norm.
+
+    Candidates are (country_score, league_norm, sidebar entry) tuples in original
+    sidebar order, so ties resolve exactly as in a full scan.
+    """
+    cached = league_index['candidates'].get(sv_country_norm)
+    if cached is not None:
+        return cached
+
+    gated = []
+    for sb_country_norm, entries in league_index['buckets'].items():
         # Country must match reasonably well first (gate check)
         country_score = fuzz.token_sort_ratio(sv_country_norm, sb_country_norm)
         if country_score < 60:
             # Also check if sv_country appears within sb_country or vice versa
             if sv_country_norm not in sb_country_norm and sb_country_norm not in sv_country_norm:
                 continue
+        for position, sb_league_norm, sl in entries:
+            gated.append((position, country_score, sb_league_norm, sl))
 
-        # Now score the league name match
-        league_score = max(
-            fuzz.token_sort_ratio(sv_league_norm, sb_league_norm),
-            fuzz.token_set_ratio(sv_league_norm, sb_league_norm),
-        )
+    gated.sort(key=lambda entry: entry[0])
+    candidates = [entry[1:] for entry in gated]
+    league_index['candidates'][sv_country_norm] = candidates
+    return candidates
+
+
+def league_candidate_score(country_score, league_score, category_mismatch, extra_words):
+    """Combined score of a sidebar league: country matters, league name matters more.
+
+    league_score is max(token_sort_ratio, token_set_ratio) of the league
+    names, halved for a women's/youth category mismatch and cut by 15% when
+    the SportyBet name has more extra words than shared ones.
+    """
+    if category_mismatch:
+        league_score = league_score * 0.5  # Heavy penalty for category mismatch
+    if extra_words:
+        league_score = league_score * 0.85  # Slight penalty for too many extra words
+    return country_score * 0.3 + league_score * 0.7
+
+
+def _min_league_ratio(country_score, category_mismatch, extra_words, best_score):
+    """Smallest league ratio (an int, as thefuzz returns) that makes a candidate
+    beat best_score and reach LEAGUE_THRESHOLD, or None if even 100 cannot."""
+    def enough(ratio):
+        score = league_candidate_score(country_score, ratio, category_mismatch, extra_words)
+        return score > best_score and score >= LEAGUE_THRESHOLD
+
+    if not enough(100):
+        return None
+    multiplier = (0.5 if category_mismatch else 1) * (0.85 if extra_words else 1)
+    target = max(best_score, LEAGUE_THRESHOLD) - country_score * 0.3
+    # Solve for the ratio, then step to the exact integer the float comparison accepts
+    ratio = min(max(math.ceil(target / (0.7 * multiplier)), 0), 100)
+    while ratio > 0 and enough(ratio - 1):
+        ratio -= 1
+    while not enough(ratio):
+        ratio += 1
+    return ratio
 
+
+def _league_ratio(sv_processed, sb_processed, needed):
+    """max(token_sort_ratio, token_set_ratio) of two processed league names, or
+    None if it is below `needed`.
+
+    Both scorers get a score_cutoff, so rapidfuzz gives up early on hopeless
+    pairs, and token_set_ratio only has to beat the token_sort_ratio already found.
+    """
+    # thefuzz rounds scores to ints, so a raw score half a point short still rounds up to `needed`
+    ratio = round(rf_fuzz.token_sort_ratio(sv_processed, sb_processed, score_cutoff=max(needed - 0.5, 0)))
+    calls = 1
+    if ratio < 100:
+        set_needed = max(needed, ratio + 1)
+        ratio = max(ratio, round(rf_fuzz.token_set_ratio(sv_processed, sb_processed,
+                                                         score_cutoff=max(set_needed - 0.5, 0))))
+        calls += 1
+    count('fuzzy_scorer_calls', calls)
+    return ratio if ratio >= needed else None
+
+
+def match_league_sidebar(sv_country, sv_league, sidebar_leagues, league_index=None):
+    """Match a SoccerVista league against SportyBet's sidebar league list.
+
+    sidebar_leagues is a list of dicts with 'sb_country', 'sb_league_name', 'sb_full_league'.
+    Pass a prebuilt league_index (see build_league_index) to avoid rescanning
+    every sidebar league on each call.
+
+    Returns (sidebar entry, score). Candidates that cannot reach
+    LEAGUE_THRESHOLD are not fully scored, so without a match the score
+    returned with None is only a lower bound.
+    """
+    if league_index is None:
+        league_index = build_league_index(sidebar_leagues)
+
+    sv_league_norm = normalize(sv_league)
+    sv_country_norm = normalize(sv_country)
+
+    best_score = 0
+    best_match = None
+
+    sv_league_processed = _full_process(sv_league_norm)
+    sv_is_special = any(w in sv_league_norm for w in SPECIAL_LEAGUE_WORDS)
+    sv_words = set(sv_league_norm.split())
+
+    candidates = country_candidates(league_index, sv_country_norm)
+    count('fuzzy_comparisons', len(candidates))
+    for country_score, sb_league_norm, sl in candidates:
         # Penalize women's/youth league matches against regular leagues
-        special_words = ['women', 'u18', 'u19', 'u21', 'u23', 'reserve', 'amateur']
-        sv_is_special = any(w in sv_league_norm for w in special_words)
-        sb_is_special = any(w in sb_league_norm for w in special_words)
-        if sv_is_special != sb_is_special:
-            league_score = league_score * 0.5  # Heavy penalty for category mismatch
+        sb_is_special = any(w in sb_league_norm for w in SPECIAL_LEAGUE_WORDS)
+        category_mismatch = sv_is_special != sb_is_special
 
         # Penalize when sb_league has many extra words not in sv_league
         # E.g., "Liga MX" should prefer "Liga MX, Clausura" over "Liga de Expansion MX, Clausura"
-        sv_words = set(sv_league_norm.split())
         sb_words = set(sb_league_norm.split())
+        extra_words = False
         if sv_words and sb_words:
             overlap = len(sv_words & sb_words)
             extra_sb = len(sb_words - sv_words)
-            if extra_sb > overlap:
-                league_score = league_score * 0.85  # Slight penalty for too many extra words
+            extra_words = extra_sb > overlap
 
-        # Combined score: country matters
-        score = (country_score * 0.3 + league_score * 0.7)
+        # The penalties are known before scoring, so skip candidates that
+        # cannot become the best match even with a perfect league name
+        needed = _min_league_ratio(country_score, category_mismatch, extra_words, best_score)
+        if needed is None:
+            continue
+        league_score = _league_ratio(sv_league_processed, _full_process(sb_league_norm), needed)
+        if league_score is None:
+            continue
 
+        score = league_candidate_score(country_score, league_score, category_mismatch, extra_words)
         if score > best_score:
             best_score = score
             best_match = sl
@@ -102,191 +325,855 @@ def match_league_sidebar(sv_country, sv_league, sidebar_leagues):
     return None, best_score
 
 
+def _full_process(name):
+    """Same preprocessing thefuzz applies before token_sort_ratio."""
+    return fuzz_utils.full_process(name, force_ascii=True)
+
+
+def team_score_matrix(sv_names, sb_names, score_cutoff=0):
+    """Score every SoccerVista team name against every SportyBet team name at once.
+
+    Both inputs must already be normalized. Each cell equals
+    max(fuzz.token_sort_ratio, fuzz.partial_ratio) for that pair, computed with
+    one rapidfuzz cdist call per scorer instead of a Python-level double loop.
+    Cells below score_cutoff may come back lower: rapidfuzz stops scoring
+    them early.
+    """
+    count('fuzzy_comparisons', len(sv_names) * len(sb_names))
+    count('fuzzy_scorer_calls', 2 * len(sv_names) * len(sb_names))
+    return _team_scores(process.cdist, sv_names, sb_names, score_cutoff)
+
+
+def team_pair_scores(sv_names, sb_names, score_cutoff=0):
+    """team_score_matrix for aligned pairs: one score per (sv_names[i], sb_names[i])."""
+    count('fuzzy_scorer_calls', 2 * len(sv_names))
+    return _team_scores(process.cpdist, sv_names, sb_names, score_cutoff)
+
+
+def _team_scores(scores, sv_names, sb_names, score_cutoff):
+    # thefuzz rounds each score to an int (round-half-even, same as np.rint),
+    # so a raw score half a point short of the cutoff still rounds up to it
+    raw_cutoff = max(score_cutoff - 0.5, 0)
+    sort_scores = scores(
+        sv_names, sb_names, scorer=rf_fuzz.token_sort_ratio,
+        processor=_full_process, dtype=np.float64, score_cutoff=raw_cutoff,
+    )
+    partial_scores = scores(
+        sv_names, sb_names, scorer=rf_fuzz.partial_ratio, dtype=np.float64, score_cutoff=raw_cutoff,
+    )
+    return np.maximum(np.rint(sort_scores), np.rint(partial_scores))
+
+
+def match_teams_batch(sv_fixtures, sb_games_in_league):
+    """Find the best matching SportyBet game for each SoccerVista fixture in a league.
+
+    sv_fixtures is a list of (home, away) name pairs. Returns one
+    (game, combined_score, (home_score, away_score)) tuple per fixture, where
+    game is None when the best pair is below TEAM_THRESHOLD.
+
+    Only pairs that can still reach TEAM_THRESHOLD are scored in full: home
+    names below TEAM_SIDE_FLOOR are cut off early, and away names are scored
+    only for the games whose home name passed. Accepted matches and their
+    scores are exact; the scores returned with a None game are lower bounds.
+    """
+    if not sv_fixtures:
+        return []
+    if sb_games_in_league.empty:
+        return [(None, 0, (0, 0)) for _ in sv_fixtures]
+
+    sv_home_norms = [normalize(home) for home, _ in sv_fixtures]
+    sv_away_norms = [normalize(away) for _, away in sv_fixtures]
+    sb_home_norms = normalized_column(sb_games_in_league, 'sb_home_team')
+    sb_away_norms = normalized_column(sb_games_in_league, 'sb_away_team')
+
+    home_scores = team_score_matrix(sv_home_norms, sb_home_norms, TEAM_SIDE_FLOOR)
+    away_scores = np.zeros_like(home_scores)
+    rows, cols = np.nonzero(home_scores >= TEAM_SIDE_FLOOR)
+    if len(rows):
+        # The away score has to make up whatever the home score lacks
+        needed = 2 * TEAM_THRESHOLD - home_scores[rows, cols]
+        away_scores[rows, cols] = team_pair_scores(
+            [sv_away_norms[row] for row in rows], [sb_away_norms[col] for col in cols], needed.min(),
+        )
+    combined = (home_scores + away_scores) / 2
+
+    # argmax keeps the first maximum, same as the strict '>' of a row scan
+    best_idx = combined.argmax(axis=1)
+
+    results = []
+    for row, col in enumerate(best_idx):
+        best_combined = float(combined[row, col])
+        best_scores = (int(home_scores[row, col]), int(away_scores[row, col]))
+        if best_combined >= TEAM_THRESHOLD:
+            results.append((sb_games_in_league.iloc[col], best_combined, best_scores))
+        else:
+            results.append((None, best_combined, best_scores))
+    return results
+
+
 def match_teams(sv_home, sv_away, sb_games_in_league):
     """Find best matching SportyBet game for a SoccerVista match."""
-    sv_home_norm = normalize(sv_home)
-    sv_away_norm = normalize(sv_away)
+    return match_teams_batch([(sv_home, sv_away)], sb_games_in_league)[0]
 
-    best_combined = 0
-    best_game = None
-    best_scores = (0, 0)
 
-    for _, game in sb_games_in_league.iterrows():
-        sb_home_norm = normalize(game['sb_home_team'])
-        sb_away_norm = normalize(game['sb_away_team'])
+def match_teams_exact(sv_fixtures, sb_games_in_league):
+    """Resolve fixtures whose normalized (home, away) pair is listed verbatim.
 
-        home_score = max(
-            fuzz.token_sort_ratio(sv_home_norm, sb_home_norm),
-            fuzz.partial_ratio(sv_home_norm, sb_home_norm),
-        )
-        away_score = max(
-            fuzz.token_sort_ratio(sv_away_norm, sb_away_norm),
-            fuzz.partial_ratio(sv_away_norm, sb_away_norm),
+    Returns one (game, 100.0, (100, 100)) tuple per exact hit, or None where the
+    fixture still needs fuzzy matching.
+    """
+    games_by_key = {}
+    sb_pairs = zip(
+        normalized_column(sb_games_in_league, 'sb_home_team'),
+        normalized_column(sb_games_in_league, 'sb_away_team'),
+    )
+    for position, key in enumerate(sb_pairs):
+        if all(key):
+            games_by_key.setdefault(key, position)
+
+    results = []
+    for sv_home, sv_away in sv_fixtures:
+        position = games_by_key.get((normalize(sv_home), normalize(sv_away)))
+        if position is None:
+            results.append(None)
+        else:
+            results.append((sb_games_in_league.iloc[position], 100.0, (100, 100)))
+    return results
+
+
+def match_teams_from_aliases(alias_conn, detail_league, sv_fixtures, sb_games_in_league):
+    """Resolve fixtures whose home and away teams both have a stored alias.
+
+    Returns one (game, combined_score, (home_score, away_score)) tuple per
+    fixture, or None where the aliases are unknown or the aliased pair is not
+    listed in sb_games_in_league (those still need fuzzy matching).
+    """
+    games_by_pair = {}
+    for position, pair in enumerate(zip(sb_games_in_league['sb_home_team'], sb_games_in_league['sb_away_team'])):
+        games_by_pair.setdefault(pair, position)
+
+    results = []
+    for sv_home, sv_away in sv_fixtures:
+        home_alias = lookup_team(alias_conn, detail_league, sv_home)
+        away_alias = lookup_team(alias_conn, detail_league, sv_away)
+        position = None
+        if home_alias and away_alias:
+            position = games_by_pair.get((home_alias[0], away_alias[0]))
+        if position is None:
+            results.append(None)
+            continue
+        scores = (home_alias[1], away_alias[1])
+        results.append((sb_games_in_league.iloc[position], (scores[0] + scores[1]) / 2, scores))
+    return results
+
+
+def match_teams_in_window(sv_fixtures, sv_kickoffs, sb_games_in_league, kickoff_index, tolerance):
+    """match_teams_batch, with each fixture scored only against games near its kickoff.
+
+    kickoff_index is build_kickoff_index() over sb_games_in_league's kickoff
+    minutes. Fixtures with the same kickoff share a candidate set and are
+    scored in one batch. Candidates keep their league order, so ties resolve
+    as in match_teams_batch.
+    """
+    by_kickoff = {}
+    for i, kickoff in enumerate(sv_kickoffs):
+        by_kickoff.setdefault(soccervista_minute(kickoff), []).append(i)
+
+    results = [None] * len(sv_fixtures)
+    for minute, members in by_kickoff.items():
+        candidates = games_in_window(kickoff_index, minute, tolerance)
+        batch = match_teams_batch([sv_fixtures[i] for i in members], sb_games_in_league.iloc[candidates])
+        for i, result in zip(members, batch):
+            results[i] = result
+    return results
+
+
+def match_teams_cross_league(sv_fixtures, sb_games_df, team_index, top_k=DEFAULT_TOP_K, allowed=None):
+    """Find each fixture's best SportyBet game in any league.
+
+    team_index is build_team_index() over sb_games_df's normalized names. Only
+    the top_k trigram candidates of each fixture are fuzzy-scored; allowed
+    optionally gives, per fixture, the sorted game positions it may match
+    (its kickoff window). Returns the same tuples as match_teams_batch.
+
+    Without a league to back it up, a combined score can pass on one team
+    alone (a club's name against another fixture of that club), and
+    partial_ratio rewards names that only share a word ("Genk City" vs
+    "Prague City"). So each team must reach CROSS_LEAGUE_THRESHOLD on its
+    own, and the best combined score is picked among those candidates only.
+    """
+    sb_home_norms = normalized_column(sb_games_df, 'sb_home_team')
+    sb_away_norms = normalized_column(sb_games_df, 'sb_away_team')
+    results = []
+    for i, (sv_home, sv_away) in enumerate(sv_fixtures):
+        sv_home_norm, sv_away_norm = normalize(sv_home), normalize(sv_away)
+        candidates = candidate_games(team_index, sv_home_norm, sv_away_norm, top_k,
+                                     allowed[i] if allowed is not None else None)
+        if not len(candidates):
+            results.append((None, 0, (0, 0)))
+            continue
+        home_scores = team_score_matrix([sv_home_norm], [sb_home_norms[c] for c in candidates],
+                                        CROSS_LEAGUE_THRESHOLD)[0]
+        away_scores = team_score_matrix([sv_away_norm], [sb_away_norms[c] for c in candidates],
+                                        CROSS_LEAGUE_THRESHOLD)[0]
+        # Only candidates where both sides pass compete; the first best (in trigram rank) wins
+        eligible = np.flatnonzero((home_scores >= CROSS_LEAGUE_THRESHOLD) & (away_scores >= CROSS_LEAGUE_THRESHOLD))
+        if not len(eligible):
+            results.append((None, 0, (0, 0)))
+            continue
+        combined = (home_scores[eligible] + away_scores[eligible]) / 2
+        best = eligible[combined.argmax()]
+        results.append((sb_games_df.iloc[candidates[best]], float(combined.max()),
+                        (int(home_scores[best]), int(away_scores[best]))))
+    return results
+
+
+def match_predictions(sv_df, sidebar_leagues, sb_games_df, alias_conn=None, verbose=True, cache=None,
+                      cross_league=False, kickoff_window=None, alias_updates=None):
+    """Cross-reference SoccerVista predictions with SportyBet leagues and games.
+
+    sv_df holds the (already filtered and ranked) SoccerVista predictions,
+    sidebar_leagues the sidebar records and sb_games_df the match details,
+    ideally with precomputed '_norm' columns (see add_normalized_columns).
+    Returns a dict with the 'matched' DataFrame (sv_df columns plus
+    MATCH_COLUMNS, in prediction order), 'positions' (the sv_df row position
+    of each matched row), plus
+    'unmatched_leagues', 'league_only_matches', 'league_tiers' and 'team_tiers'.
+
+    Pass a cache from new_match_cache() to reuse league and team resolutions
+    across calls (watch mode). Call refresh_match_cache() whenever the
+    SportyBet data changes.
+
+    With cross_league, fixtures left without a team match are searched for
+    across all of sb_games_df (see match_teams_cross_league).
+
+    kickoff_window (see kickoff_index.kickoff_window) limits fuzzy and
+    cross-league team matching to games near each prediction's kickoff.
+
+    With an alias_updates list, accepted resolutions are appended to it as
+    (alias_store record function, args) instead of being written, so
+    alias_conn is only read (see match_predictions_parallel).
+    """
+    if not sb_games_df.empty:
+        with span('normalize'):
+            add_normalized_columns(sb_games_df)
+    league_index = build_league_index(sidebar_leagues)
+    sidebar_by_full_league = {}
+    for sl in sidebar_leagues:
+        sidebar_by_full_league.setdefault(sl['sb_full_league'], sl)
+
+    sv_countries = sv_df['Country'].tolist()
+    sv_leagues = sv_df['League'].tolist()
+    sv_homes = sv_df['Home Team'].tolist()
+    sv_aways = sv_df['Away Team'].tolist()
+    sv_kickoffs = sv_df['Kickoff (UTC)'].tolist()
+
+    # UTC kickoff minute of every SportyBet game, when kickoff blocking is on
+    sb_minutes = None
+    if kickoff_window and not sb_games_df.empty:
+        sb_minutes = sportybet_minutes(sb_games_df['sb_date'].tolist(), sb_games_df['sb_kickoff'].tolist(),
+                                       kickoff_window['utc_offset'], kickoff_window['match_date'])
+        circular = kickoff_window['match_date'] is None
+
+    def remember(record, *args):
+        if alias_updates is not None:
+            alias_updates.append((record, args))
+        else:
+            record(alias_conn, *args)
+
+    def remember_teams(sb_league, fixture, game, scores):
+        # A combined match can carry one weak side; only keep the sides that passed on their own
+        for sv_team, sb_team, score in zip(fixture, (game['sb_home_team'], game['sb_away_team']), scores):
+            if score >= TEAM_THRESHOLD:
+                remember(record_team, sb_league, sv_team, sb_team, score)
+
+    detail_leagues = []
+    if not sb_games_df.empty:
+        detail_leagues = list(
+            sb_games_df[['sb_league', 'sb_league_norm']].drop_duplicates('sb_league').itertuples(index=False)
         )
-        combined = (home_score + away_score) / 2
 
-        if combined > best_combined:
-            best_combined = combined
-            best_game = game
-            best_scores = (home_score, away_score)
+    unmatched_leagues = set()
+    league_only_matches = 0
+    # How many distinct leagues / fixtures each resolution tier settled
+    # (match cache, exact key, alias store, fuzzy)
+    league_tiers = {'cached': 0, 'exact': 0, 'alias': 0, 'fuzzy': 0}
+    team_tiers = {'cached': 0, 'exact': 0, 'alias': 0, 'fuzzy': 0, 'cross_league': 0}
 
-    if best_combined >= TEAM_THRESHOLD and best_game is not None:
-        return best_game, best_combined, best_scores
-    return None, best_combined, best_scores
+    # Step 1: Resolve the SportyBet league (and detail league) once per distinct
+    # SoccerVista (country, league), then broadcast it to that league's fixtures
+    with span('league match'):
+        group_of_row = sv_df.groupby(['Country', 'League'], sort=False, dropna=False).ngroup().tolist()
+        # Groups are numbered in order of first appearance
+        league_keys = {}
+        for sv_position, group in enumerate(group_of_row):
+            league_keys.setdefault(group, (sv_countries[sv_position], sv_leagues[sv_position]))
+        league_resolutions = []
+        for sv_country, sv_league in league_keys.values():
 
+            cached = cache['leagues'].get((sv_country, sv_league)) if cache is not None else None
+            if cached is not None:
+                league_resolutions.append(cached)
+                league_tiers['cached'] += 1
+                continue
+
+            # Exact (country, league) key first; then a league known from an earlier
+            # run (only if still listed in today's sidebar)
+            sb_league_info = match_league_exact(sv_country, sv_league, league_index)
+            if sb_league_info:
+                league_score = 100.0
+                league_tiers['exact'] += 1
+            else:
+                alias = lookup_league(alias_conn, sv_country, sv_league) if alias_conn else None
+                if alias and alias[0] in sidebar_by_full_league:
+                    sb_league_info, league_score = sidebar_by_full_league[alias[0]], alias[1]
+                    league_tiers['alias'] += 1
+                    remember(touch_league, sv_country, sv_league)
+                else:
+                    # Match league using sidebar (broad coverage)
+                    sb_league_info, league_score = match_league_sidebar(
+                        sv_country, sv_league, sidebar_leagues, league_index
+                    )
+                    league_tiers['fuzzy'] += 1
+                    if sb_league_info and alias_conn:
+                        remember(record_league, sv_country, sv_league,
+                                 sb_league_info['sb_full_league'], league_score)
+
+            # Map sidebar league to match detail leagues
+            matched_detail_league = None
+            if sb_league_info and detail_leagues:
+                sidebar_norm = normalized(sb_league_info, 'sb_full_league')
+                for detail_league, detail_norm in detail_leagues:
+                    if fuzz.token_sort_ratio(detail_norm, sidebar_norm) >= 80:
+                        matched_detail_league = detail_league
+                        break
+
+            league_resolutions.append((sb_league_info, league_score, matched_detail_league))
+            if cache is not None:
+                cache['leagues'][(sv_country, sv_league)] = league_resolutions[-1]
+
+        resolved = []
+        for sv_position, group in enumerate(group_of_row):
+            sb_league_info, league_score, matched_detail_league = league_resolutions[group]
+            if not sb_league_info:
+                unmatched_leagues.add(f"{sv_countries[sv_position]}: {sv_leagues[sv_position]}")
+                # Still a candidate for a team match in any league
+                if cross_league:
+                    resolved.append((sv_position, None, 0, None))
+                continue
+            resolved.append((sv_position, sb_league_info['sb_full_league'], league_score, matched_detail_league))
+
+    # Step 2: Team-level matching, batched per detail league
+    with span('team match'):
+        fixtures_by_league = {}
+        for position, (_, _, _, detail_league) in enumerate(resolved):
+            if detail_league:
+                fixtures_by_league.setdefault(detail_league, []).append(position)
+
+        team_results = {}
+        for detail_league, positions in fixtures_by_league.items():
+            fixtures = [(sv_homes[resolved[p][0]], sv_aways[resolved[p][0]]) for p in positions]
+            if cache is not None:
+                misses = []
+                for position, fixture in zip(positions, fixtures):
+                    # The kickoff is part of the key: it decides the candidate games
+                    cached = cache['teams'].get((detail_league, *fixture, sv_kickoffs[resolved[position][0]]))
+                    if cached is not None:
+                        team_results[position] = cached
+                        team_tiers['cached'] += 1
+                    else:
+                        misses.append((position, fixture))
+                if not misses:
+                    continue
+                positions = [position for position, _ in misses]
+                fixtures = [fixture for _, fixture in misses]
+            in_league = (sb_games_df['sb_league'] == detail_league).to_numpy()
+            sb_in_league = sb_games_df[in_league]
+
+            # Fixtures that match verbatim, or whose teams are already known, skip fuzzy matching
+            unresolved = []
+            for position, fixture, exact_result in zip(
+                positions, fixtures, match_teams_exact(fixtures, sb_in_league)
+            ):
+                if exact_result is not None:
+                    team_results[position] = exact_result
+                    team_tiers['exact'] += 1
+                else:
+                    unresolved.append((position, fixture))
+            if alias_conn and unresolved:
+                alias_results = match_teams_from_aliases(
+                    alias_conn, detail_league, [fixture for _, fixture in unresolved], sb_in_league
+                )
+            else:
+                alias_results = [None] * len(unresolved)
+            pending = []
+            for (position, fixture), alias_result in zip(unresolved, alias_results):
+                if alias_result is not None:
+                    team_results[position] = alias_result
+                    team_tiers['alias'] += 1
+                    remember(touch_team, detail_league, fixture[0])
+                    remember(touch_team, detail_league, fixture[1])
+                else:
+                    pending.append((position, fixture))
+            team_tiers['fuzzy'] += len(pending)
+
+            pending_fixtures = [fixture for _, fixture in pending]
+            if sb_minutes is not None:
+                batch_results = match_teams_in_window(
+                    pending_fixtures, [sv_kickoffs[resolved[position][0]] for position, _ in pending],
+                    sb_in_league, build_kickoff_index(sb_minutes[in_league], circular),
+                    kickoff_window['tolerance'],
+                )
+            else:
+                batch_results = match_teams_batch(pending_fixtures, sb_in_league)
+            for (position, (sv_home, sv_away)), result in zip(pending, batch_results):
+                team_results[position] = result
+                game, _, (home_sc, away_sc) = result
+                if game is not None and alias_conn:
+                    remember_teams(detail_league, (sv_home, sv_away), game, (home_sc, away_sc))
+
+            if cache is not None:
+                for position, fixture in zip(positions, fixtures):
+                    key = (detail_league, *fixture, sv_kickoffs[resolved[position][0]])
+                    cache['teams'][key] = team_results[position]
+
+        # Fixtures still without a game: search every league through the trigram index
+        cross_results = {}
+        if cross_league and not sb_games_df.empty:
+            pending = [position for position, (_, _, _, detail_league) in enumerate(resolved)
+                       if detail_league is None or team_results[position][0] is None]
+            team_index = kickoff_index = None
+            for position in pending:
+                fixture = (sv_homes[resolved[position][0]], sv_aways[resolved[position][0]])
+                kickoff = sv_kickoffs[resolved[position][0]]
+                # Cross-league results depend on every league's games; cached under league None
+                cached = cache['teams'].get((None, *fixture, kickoff)) if cache is not None else None
+                if cached is not None:
+                    result = cached
+                else:
+                    if team_index is None:
+                        team_index = build_team_index(normalized_column(sb_games_df, 'sb_home_team'),
+                                                      normalized_column(sb_games_df, 'sb_away_team'))
+                    allowed = None
+                    if sb_minutes is not None:
+                        if kickoff_index is None:
+                            kickoff_index = build_kickoff_index(sb_minutes, circular)
+                        allowed = [games_in_window(kickoff_index, soccervista_minute(kickoff),
+                                                   kickoff_window['tolerance'])]
+                    result = match_teams_cross_league([fixture], sb_games_df, team_index, allowed=allowed)[0]
+                    if cache is not None:
+                        cache['teams'][(None, *fixture, kickoff)] = result
+                    game, _, (home_sc, away_sc) = result
+                    if game is not None and alias_conn:
+                        remember_teams(game['sb_league'], fixture, game, (home_sc, away_sc))
+                    if game is not None:
+                        team_tiers['cross_league'] += 1
+                if result[0] is not None:
+                    cross_results[position] = result
+
+    # Step 3: Build the output columns in prediction order; the SoccerVista
+    # columns are taken from sv_df in one bulk row selection
+    sv_positions = []
+    extra = {column: [] for column in MATCH_COLUMNS}
+
+    def add_row(sv_position, sb_league, sb_home, sb_away, league_score, team_score, match_type):
+        sv_positions.append(sv_position)
+        for column, value in zip(MATCH_COLUMNS, (sb_league, sb_home, sb_away, league_score,
+                                                 team_score, match_type)):
+            extra[column].append(value)
+
+    for position, (sv_position, sb_full_league, league_score, matched_detail_league) in enumerate(resolved):
+        sv_home, sv_away = sv_homes[sv_position], sv_aways[sv_position]
+        if position in cross_results:
+            game, team_score, _ = cross_results[position]
+            add_row(sv_position, game['sb_league'], game['sb_home_team'], game['sb_away_team'],
+                    league_score, round(team_score, 1), CROSS_LEAGUE_MATCH_TYPE)
+            if sb_full_league is None:
+                unmatched_leagues.discard(f"{sv_countries[sv_position]}: {sv_leagues[sv_position]}")
+            if verbose:
+                print(f"  CROSS-LEAGUE MATCH: {sv_home} vs {sv_away} "
+                      f"-> {game['sb_home_team']} vs {game['sb_away_team']} in {game['sb_league']} "
+                      f"(team:{team_score:.0f}%)")
+        elif sb_full_league is None:
+            # League not found and no team match anywhere
+            continue
+        elif matched_detail_league:
+            # We have match details - use the precise team match
+            game, team_score, (home_sc, away_sc) = team_results[position]
+
+            if game is not None:
+                add_row(sv_position, sb_full_league, game['sb_home_team'], game['sb_away_team'],
+                        league_score, round(team_score, 1), 'Full (league + team)')
+                if verbose:
+                    print(f"  FULL MATCH: {sv_home} vs {sv_away} "
+                          f"-> {game['sb_home_team']} vs {game['sb_away_team']} "
+                          f"(league:{league_score:.0f}%, team:{team_score:.0f}%)")
+            # If team not found in details, it might not be on this league's page yet
+            # Still include as league-only match
+            else:
+                add_row(sv_position, sb_full_league, '(verify on SportyBet)', '(verify on SportyBet)',
+                        league_score, 0, 'League only (team not in scraped page)')
+                league_only_matches += 1
+                if verbose:
+                    print(f"  LEAGUE MATCH: {sv_home} vs {sv_away} "
+                          f"-> {sb_full_league} (league:{league_score:.0f}%, teams not verified)")
+        else:
+            # No match details for this league - league-only match
+            add_row(sv_position, sb_full_league, '(verify on SportyBet)', '(verify on SportyBet)',
+                    league_score, 0, 'League only (no match details scraped)')
+            league_only_matches += 1
+            if verbose:
+                print(f"  LEAGUE MATCH: {sv_home} vs {sv_away} "
+                      f"-> {sb_full_league} (league:{league_score:.0f}%, teams not verified)")
+
+    matched = sv_df.iloc[sv_positions].reset_index(drop=True)
+    for column, values in extra.items():
+        matched[column] = values
+
+    for tier in ('exact', 'alias', 'fuzzy'):
+        count(f'league_{tier}_resolutions', league_tiers[tier])
+        count(f'team_{tier}_resolutions', team_tiers[tier])
+    count('team_cross_league_resolutions', team_tiers['cross_league'])
+
+    return {
+        'matched': matched,
+        'positions': sv_positions,
+        'unmatched_leagues': unmatched_leagues,
+        'league_only_matches': league_only_matches,
+        'league_tiers': league_tiers,
+        'team_tiers': team_tiers,
+    }
+
+
+def shard_predictions(sv_df, shards):
+    """Split the row positions of sv_df into at most `shards` lists by country.
+
+    All of a country's predictions go to one shard, so every SoccerVista
+    league is resolved exactly once. Countries are dealt largest first to the
+    shard with the fewest rows, which keeps shards balanced and the split
+    deterministic. Each list is in sv_df order.
+    """
+    by_country = {}
+    for position, group in enumerate(sv_df.groupby('Country', sort=False, dropna=False).ngroup().tolist()):
+        by_country.setdefault(group, []).append(position)
+    bins = [[] for _ in range(min(shards, len(by_country)))]
+    for positions in sorted(by_country.values(), key=len, reverse=True):
+        min(bins, key=len).extend(positions)
+    return [sorted(positions) for positions in bins]
+
+
+# Per-process state of a parallel matching worker, set by _init_match_worker
+_worker = {}
+
+
+def _init_match_worker(sidebar_leagues, sb_games_df, alias_db, options):
+    _worker.update(sidebar_leagues=sidebar_leagues, sb_games_df=sb_games_df, options=options,
+                   alias_conn=open_store_readonly(alias_db) if alias_db else None)
 
-def main():
-    sv_file = sys.argv[1] if len(sys.argv) > 1 else '.tmp/soccervista_raw.md'
-    sb_games_file = sys.argv[2] if len(sys.argv) > 2 else '.tmp/sportybet_games.csv'
-    sb_leagues_file = '.tmp/sportybet_leagues.csv'
 
-    # Parse soccervista predictions
-    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-    from parse_soccervista import parse_matches
+def _match_shard(sv_shard):
+    """Run match_predictions on one shard; output, alias writes and counters go back to the parent."""
+    reset()
+    alias_updates = []
+    output = io.StringIO()
+    with redirect_stdout(output):
+        result = match_predictions(sv_shard, _worker['sidebar_leagues'], _worker['sb_games_df'],
+                                   _worker['alias_conn'], alias_updates=alias_updates, **_worker['options'])
+    result['alias_updates'] = alias_updates
+    result['lines'] = output.getvalue().splitlines()
+    result['counters'] = snapshot('match_games')['counters']
+    return result
+
+
+def match_predictions_parallel(sv_df, sidebar_leagues, sb_games_df, alias_db=None, workers=None,
+                               verbose=True, cross_league=False, kickoff_window=None):
+    """match_predictions spread over a pool of `workers` processes (default: one per CPU).
+
+    The predictions are sharded by country (see shard_predictions). Each
+    worker receives the sidebar and the games once, at start-up, and only
+    reads the alias store at alias_db; the resolutions the workers accept are
+    written here afterwards. A run never looks up an alias it recorded
+    itself, so every fixture resolves exactly as in a serial run. The shards'
+    rows (and verbose lines) are merged back into prediction order, so the
+    returned dict, the ranking and the Match Type labels equal match_predictions'.
+    """
+    alias_conn = open_store(alias_db) if alias_db else None
+    shards = shard_predictions(sv_df, (workers or os.cpu_count()) * SHARDS_PER_WORKER)
+    if not shards:
+        result = match_predictions(sv_df, sidebar_leagues, sb_games_df, alias_conn, verbose=verbose,
+                                   cross_league=cross_league, kickoff_window=kickoff_window)
+    else:
+        if not sb_games_df.empty:
+            with span('normalize'):
+                add_normalized_columns(sb_games_df)
+        options = {'verbose': verbose, 'cross_league': cross_league, 'kickoff_window': kickoff_window}
+        with span('parallel match'), ProcessPoolExecutor(
+            workers, initializer=_init_match_worker,
+            initargs=(sidebar_leagues, sb_games_df, alias_db, options),
+        ) as pool:
+            shard_results = list(pool.map(_match_shard, [sv_df.iloc[positions] for positions in shards]))
+
+        order, lines = [], []
+        for positions, shard_result in zip(shards, shard_results):
+            order.extend(positions[p] for p in shard_result['positions'])
+            lines.extend(shard_result['lines'])
+            for record, args in shard_result['alias_updates']:
+                if alias_conn:
+                    record(alias_conn, *args)
+            for name, n in shard_result['counters'].items():
+                count(name, n)
+
+        # Empty frames would turn typed columns into object columns
+        frames = [r['matched'] for r in shard_results if not r['matched'].empty] or [shard_results[0]['matched']]
+        merged = np.argsort(order, kind='stable')
+        result = {
+            'matched': pd.concat(frames, ignore_index=True).iloc[merged].reset_index(drop=True),
+            'positions': [order[i] for i in merged],
+            'unmatched_leagues': set().union(*(r['unmatched_leagues'] for r in shard_results)),
+            'league_only_matches': sum(r['league_only_matches'] for r in shard_results),
+            'league_tiers': {tier: sum(r['league_tiers'][tier] for r in shard_results)
+                             for tier in shard_results[0]['league_tiers']},
+            'team_tiers': {tier: sum(r['team_tiers'][tier] for r in shard_results)
+                           for tier in shard_results[0]['team_tiers']},
+        }
+        # Verbose output has one line per matched row
+        for i in merged if lines else ():
+            print(lines[i])
+
+    if alias_conn:
+        alias_conn.commit()
+        alias_conn.close()
+    return result
+
+
+def new_match_cache():
+    """Empty resolution cache for match_predictions."""
+    return {'leagues': {}, 'teams': {}, 'sidebar': None, 'detail_leagues': None, 'league_games': {}}
+
+
+def refresh_match_cache(cache, sidebar_leagues, sb_games_df):
+    """Drop cached resolutions that new SportyBet data invalidates.
+
+    League resolutions depend on the sidebar and the list of detail leagues,
+    so they are all dropped when either changes. Team resolutions are dropped
+    only for detail leagues whose games changed. Returns the set of changed
+    detail leagues.
+    """
+    # Game counts are not used for matching, so a count change keeps the cache
+    sidebar = [(sl['sb_country'], sl['sb_league_name'], sl['sb_full_league']) for sl in sidebar_leagues]
+    league_games = {}
+    if not sb_games_df.empty:
+        columns = ['sb_league', 'sb_home_team', 'sb_away_team', 'sb_kickoff', 'sb_date', 'sb_match_id']
+        for row in sb_games_df[columns].itertuples(index=False):
+            league_games.setdefault(row[0], []).append(tuple(row))
+    detail_leagues = list(league_games)
+
+    if sidebar != cache['sidebar'] or detail_leagues != cache['detail_leagues']:
+        cache['leagues'].clear()
+    changed = {
+        league for league in set(league_games) | set(cache['league_games'])
+        if league_games.get(league) != cache['league_games'].get(league)
+    }
+    if changed:
+        # Cross-league entries (league None) were searched over every league's games
+        cache['teams'] = {key: result for key, result in cache['teams'].items()
+                          if key[0] is not None and key[0] not in changed}
+
+    cache['sidebar'] = sidebar
+    cache['detail_leagues'] = detail_leagues
+    cache['league_games'] = league_games
+    return changed
+
+
+def rank_matches(matched, match_date):
+    """Turn the matched DataFrame into the ranked output table, dated match_date (the snapshot's day)."""
+    result_df = matched.sort_values('Win Probability %', ascending=False)
+    result_df.insert(0, 'Rank', range(1, len(result_df) + 1))
+    result_df.insert(1, 'Match Date', match_date.isoformat())
+    return result_df
+
+
+def load_soccervista_predictions(sv_file):
+    """Load SoccerVista predictions (raw markdown or the typed table), keep 60%+ and rank them.
+
+    Returns (number of predictions parsed, filtered DataFrame sorted by win probability).
+    """
+    from parse_soccervista import iter_matches, records_to_frame
+
+    with span('parse'):
+        if sv_file.endswith(TABLE_EXTENSION):
+            sv_all = read_table('soccervista_matches', sv_file)
+            parsed = len(sv_all)
+            sv_df = sv_all[sv_all['Win Probability %'] >= 60]
+        else:
+            # Filter to 60%+ win probability while the file is being parsed
+            parsed = 0
+            sv_matches = []
+            for match in iter_matches(sv_file):
+                parsed += 1
+                if match.win_probability >= 60:
+                    sv_matches.append(match)
+            sv_df = records_to_frame(sv_matches)
+
+    if not sv_df.empty:
+        sv_df = sv_df.sort_values('Win Probability %', ascending=False)
+    return parsed, sv_df
+
+
+def write_match_outputs(result_df, directory='.'):
+    """Write the ranked table: typed .tmp table plus matched_predictions.xlsx/.csv.
+
+    Every file is written to a temporary name and renamed into place, so
+    readers never see a partial file. Returns the typed table's path.
+    """
+    with span('export'):
+        table_output = write_table(result_df, 'matched_predictions')
+        for path, write in (
+            (os.path.join(directory, 'matched_predictions.xlsx'),
+             lambda tmp: result_df.to_excel(tmp, index=False)),
+            (os.path.join(directory, 'matched_predictions.csv'),
+             lambda tmp: result_df.to_csv(tmp, index=False)),
+        ):
+            # Keep the extension last so pandas still picks the Excel writer
+            base, ext = os.path.splitext(path)
+            tmp_path = f"{base}.part{ext}"
+            write(tmp_path)
+            os.replace(tmp_path, path)
+    return table_output
+
+
+@instrumented('match_games')
+def main():
+    parser = argparse.ArgumentParser(description="Match SoccerVista predictions to SportyBet games")
+    # SoccerVista input: raw markdown, or the typed table written by parse_soccervista.py
+    parser.add_argument('sv_file', nargs='?', default='.tmp/soccervista_raw.md')
+    parser.add_argument('sb_games_file', nargs='?', default=table_path('sportybet_games'))
+    parser.add_argument('--cross-league', action='store_true',
+                        help="Search every league for fixtures without a team match")
+    parser.add_argument('--kickoff-tolerance', type=float, default=DEFAULT_TOLERANCE_MINUTES,
+                        help="Only match games kicking off within this many minutes of the prediction")
+    parser.add_argument('--sportybet-utc-offset', type=float, default=DEFAULT_SPORTYBET_UTC_OFFSET,
+                        help="UTC offset (hours) of the SportyBet kickoff times")
+    parser.add_argument('--date', type=date.fromisoformat,
+                        help="SoccerVista match date (default: inferred from --snapshot or the SoccerVista file)")
+    parser.add_argument('--snapshot',
+                        help="Raw SoccerVista snapshot a parsed .arrow input came from, used to date it")
+    parser.add_argument('--no-kickoff-filter', action='store_true',
+                        help="Score every game in the league regardless of kickoff")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Match in this many processes, sharded by country (0 = one per CPU)")
+    args = parser.parse_args()
+    sv_file = args.sv_file
+    sb_games_file = args.sb_games_file
+    sb_leagues_file = table_path('sportybet_leagues')
+    # Set ALIAS_DB to an empty string to disable the alias store
+    alias_db = os.getenv('ALIAS_DB', DEFAULT_ALIAS_DB)
 
     if not os.path.exists(sv_file):
         print(f"Error: {sv_file} not found. Run scrape_soccervista.py first.")
         sys.exit(1)
 
     print(f"Loading SoccerVista predictions from: {sv_file}")
-    sv_matches = parse_matches(sv_file)
-    sv_df = pd.DataFrame(sv_matches)
+    parsed, sv_df = load_soccervista_predictions(sv_file)
 
-    if sv_df.empty:
+    if not parsed:
         print("No SoccerVista predictions found!")
         sys.exit(1)
 
-    # Filter to 60%+ win probability
-    sv_df = sv_df[sv_df['Win Probability %'] >= 60]
-    sv_df = sv_df.sort_values('Win Probability %', ascending=False)
     print(f"  SoccerVista predictions (60%+): {len(sv_df)}")
 
     # Load SportyBet sidebar leagues (broad coverage)
     sidebar_leagues = []
     if os.path.exists(sb_leagues_file):
-        sidebar_df = pd.read_csv(sb_leagues_file)
+        sidebar_df = read_table('sportybet_leagues', sb_leagues_file)
+        with span('normalize'):
+            sidebar_df = add_normalized_columns(sidebar_df)
         sidebar_leagues = sidebar_df.to_dict('records')
         print(f"\nLoaded {len(sidebar_leagues)} SportyBet sidebar leagues")
 
     # Load SportyBet match details (narrow but precise)
     sb_games_df = pd.DataFrame()
     if os.path.exists(sb_games_file):
-        sb_games_df = pd.read_csv(sb_games_file)
+        sb_games_df = read_table('sportybet_games', sb_games_file)
+        with span('normalize'):
+            sb_games_df = add_normalized_columns(sb_games_df)
         print(f"Loaded {len(sb_games_df)} SportyBet match details")
 
     if not sidebar_leagues and sb_games_df.empty:
         print("Error: No SportyBet data found. Run scrape_sportybet.py + parse_sportybet.py first.")
         sys.exit(1)
 
+    from combine_predictions import infer_snapshot_date
+    date_source = args.snapshot if args.snapshot and os.path.exists(args.snapshot) else sv_file
+    match_date = args.date or infer_snapshot_date(date_source)
+    window = None
+    if not args.no_kickoff_filter:
+        window = kickoff_window(args.kickoff_tolerance, args.sportybet_utc_offset, match_date)
+
     # Cross-reference
     print("\n=== MATCHING ===")
-    matched = []
-    unmatched_leagues = set()
-    league_only_matches = 0
-
-    for _, sv_row in sv_df.iterrows():
-        sv_country = sv_row['Country']
-        sv_league = sv_row['League']
-
-        # Step 1: Match league using sidebar (broad coverage)
-        sb_league_info, league_score = match_league_sidebar(
-            sv_country, sv_league, sidebar_leagues
-        )
-
-        if not sb_league_info:
-            league_key = f"{sv_country}: {sv_league}"
-            if league_key not in unmatched_leagues:
-                unmatched_leagues.add(league_key)
-            continue
-
-        sb_full_league = sb_league_info['sb_full_league']
-
-        # Step 2: Try team-level matching if match details available
-        # Map sidebar league to match detail leagues
-        matched_detail_league = None
+    print(f"Match date: {match_date.isoformat()} ({'--date' if args.date else date_source})")
+    if window:
+        print(f"Kickoff window: {describe_window(window)}")
         if not sb_games_df.empty:
-            for detail_league in sb_games_df['sb_league'].unique():
-                detail_norm = normalize(detail_league)
-                sidebar_norm = normalize(sb_full_league)
-                if fuzz.token_sort_ratio(detail_norm, sidebar_norm) >= 80:
-                    matched_detail_league = detail_league
-                    break
-
-        if matched_detail_league:
-            # We have match details - do precise team matching
-            sb_in_league = sb_games_df[sb_games_df['sb_league'] == matched_detail_league]
-            game, team_score, (home_sc, away_sc) = match_teams(
-                sv_row['Home Team'], sv_row['Away Team'], sb_in_league
-            )
+            sb_minutes = sportybet_minutes(sb_games_df['sb_date'].tolist(), sb_games_df['sb_kickoff'].tolist(),
+                                           window['utc_offset'], window['match_date'])
+            covered, known = window_coverage(sb_minutes, sv_df['Kickoff (UTC)'].tolist(), window['tolerance'])
+            if known and not covered:
+                print(f"Warning: none of the {known} SportyBet games kicks off within "
+                      f"+/-{window['tolerance']:g} min of a SoccerVista kickoff on {match_date.isoformat()}; "
+                      f"only verbatim and alias team matches are possible. "
+                      f"Check --date / --sportybet-utc-offset, or use --no-kickoff-filter")
+    if args.workers != 1:
+        result = match_predictions_parallel(sv_df, sidebar_leagues, sb_games_df, alias_db or None,
+                                            workers=args.workers or None, cross_league=args.cross_league,
+                                            kickoff_window=window)
+    else:
+        alias_conn = open_store(alias_db) if alias_db else None
+        result = match_predictions(sv_df, sidebar_leagues, sb_games_df, alias_conn,
+                                   cross_league=args.cross_league, kickoff_window=window)
+        if alias_conn:
+            alias_conn.commit()
+            alias_conn.close()
+    cache_info = normalize.cache_info()
+    count('normalize_cache_hits', cache_info.hits)
+    count('normalize_cache_misses', cache_info.misses)
 
-            if game is not None:
-                row = sv_row.to_dict()
-                row['SportyBet League'] = sb_full_league
-                row['SportyBet Home'] = game['sb_home_team']
-                row['SportyBet Away'] = game['sb_away_team']
-                row['League Match %'] = league_score
-                row['Team Match %'] = round(team_score, 1)
-                row['Match Type'] = 'Full (league + team)'
-                matched.append(row)
-                print(f"  FULL MATCH: {sv_row['Home Team']} vs {sv_row['Away Team']} "
-                      f"-> {game['sb_home_team']} vs {game['sb_away_team']} "
-                      f"(league:{league_score:.0f}%, team:{team_score:.0f}%)")
-            # If team not found in details, it might not be on this league's page yet
-            # Still include as league-only match
-            else:
-                row = sv_row.to_dict()
-                row['SportyBet League'] = sb_full_league
-                row['SportyBet Home'] = '(verify on SportyBet)'
-                row['SportyBet Away'] = '(verify on SportyBet)'
-                row['League Match %'] = league_score
-                row['Team Match %'] = 0
-                row['Match Type'] = 'League only (team not in scraped page)'
-                matched.append(row)
-                league_only_matches += 1
-                print(f"  LEAGUE MATCH: {sv_row['Home Team']} vs {sv_row['Away Team']} "
-                      f"-> {sb_full_league} (league:{league_score:.0f}%, teams not verified)")
-        else:
-            # No match details for this league - league-only match
-            row = sv_row.to_dict()
-            row['SportyBet League'] = sb_full_league
-            row['SportyBet Home'] = '(verify on SportyBet)'
-            row['SportyBet Away'] = '(verify on SportyBet)'
-            row['League Match %'] = league_score
-            row['Team Match %'] = 0
-            row['Match Type'] = 'League only (no match details scraped)'
-            matched.append(row)
-            league_only_matches += 1
-            print(f"  LEAGUE MATCH: {sv_row['Home Team']} vs {sv_row['Away Team']} "
-                  f"-> {sb_full_league} (league:{league_score:.0f}%, teams not verified)")
+    matched = result['matched']
+    unmatched_leagues = result['unmatched_leagues']
+    league_only_matches = result['league_only_matches']
+    league_tiers = result['league_tiers']
+    team_tiers = result['team_tiers']
 
     print(f"\n=== RESULTS ===")
-    full_matches = len(matched) - league_only_matches
+    cross_league_matches = int((matched['Match Type'] == CROSS_LEAGUE_MATCH_TYPE).sum()) if len(matched) else 0
+    full_matches = len(matched) - league_only_matches - cross_league_matches
     print(f"Total matched: {len(matched)} games out of {len(sv_df)} predictions")
     print(f"  Full matches (league + team verified): {full_matches}")
     print(f"  League-only matches (team needs manual verify): {league_only_matches}")
+    if args.cross_league:
+        print(f"  Cross-league team matches (league needs manual verify): {cross_league_matches}")
+    print(f"  League resolution ({sum(league_tiers.values())} distinct leagues): "
+          f"{league_tiers['exact']} exact, {league_tiers['alias']} alias, {league_tiers['fuzzy']} fuzzy")
+    print(f"  Team resolution:   {team_tiers['exact']} exact, {team_tiers['alias']} alias, "
+          f"{team_tiers['fuzzy']} fuzzy" + (f", {team_tiers['cross_league']} cross-league"
+                                            if args.cross_league else ''))
 
     if unmatched_leagues:
         print(f"\nLeagues not found on SportyBet ({len(unmatched_leagues)}):")
         for league in sorted(unmatched_leagues):
             print(f"  - {league}")
 
-    if not matched:
+    if matched.empty:
         print("\nNo matches found.")
         return
 
-    result_df = pd.DataFrame(matched)
-    result_df = result_df.sort_values('Win Probability %', ascending=False)
-    result_df.insert(0, 'Rank', range(1, len(result_df) + 1))
-
-    # Save outputs
-    os.makedirs('.tmp', exist_ok=True)
-    result_df.to_excel('.tmp/matched_predictions.xlsx', index=False)
-    result_df.to_csv('.tmp/matched_predictions.csv', index=False)
+    result_df = rank_matches(matched, match_date)
 
-    result_df.to_excel('matched_predictions.xlsx', index=False)
-    result_df.to_csv('matched_predictions.csv', index=False)
+    # Save outputs: typed table for downstream tools, Excel/CSV as final exports
+    table_output = write_match_outputs(result_df)
 
-    print(f"\nSaved to: matched_predictions.xlsx / .csv")
+    print(f"\nSaved to: matched_predictions.xlsx / .csv ({table_output})")
     print(f"\nFinal matched predictions:")
     for _, row in result_df.iterrows():
         match_type = "✓" if row.get('Match Type', '').startswith('Full') else "~"
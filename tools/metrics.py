@@ -0,0 +1,129 @@
+"""
+Per-stage timing and counter instrumentation shared by the tools.
+
+Tools wrap their stages in span(...) and bump counters with count(...). When
+a tool decorated with @instrumented finishes, one JSON line is appended to the
+metrics log with the wall/CPU time of every stage, the counters and the peak
+RSS of the process:
+
+  {"tool": "match_games", "started_at": "...", "exit": "ok",
+   "spans": {"total": {"wall": 2.41, "cpu": 2.30, "calls": 1}, "league match": {...}},
+   "counters": {"rows_parsed": 312, "fuzzy_comparisons": 18804, ...},
+   "peak_rss_bytes": 148897792}
+
+Span names used across the tools: scrape, parse, normalize, league match,
+team match, parallel match, export (plus "total" for the whole run).
+
+Environment:
+  METRICS_FILE  metrics log path (default .tmp/metrics.jsonl); set empty to disable
+  PROFILE       set to 1 to run the tool under cProfile; stats are written to
+                .tmp/profiles/<tool>.prof (view with: python3 -m pstats <file>)
+"""
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_METRICS_FILE = '.tmp/metrics.jsonl'
+PROFILE_DIR = '.tmp/profiles'
+
+# Stage name -> {'wall', 'cpu', 'calls'}, in first-seen order
+_spans = {}
+_counters = {}
+
+
+def reset():
+    """Forget all recorded spans and counters."""
+    _spans.clear()
+    _counters.clear()
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as stage `name` (repeated spans accumulate)."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        entry = _spans.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+        entry['wall'] += time.perf_counter() - wall
+        entry['cpu'] += time.process_time() - cpu
+        entry['calls'] += 1
+
+
+def count(name, n=1):
+    """Add n to counter `name`."""
+    _counters[name] = _counters.get(name, 0) + n
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process in bytes, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def snapshot(tool):
+    """Current metrics as a dict."""
+    return {
+        'tool': tool,
+        'spans': {
+            name: {'wall': round(e['wall'], 6), 'cpu': round(e['cpu'], 6), 'calls': e['calls']}
+            for name, e in _spans.items()
+        },
+        'counters': dict(_counters),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def write_metrics(tool, path=None, **extra):
+    """Append this run's metrics as one JSON line. Returns the path, or None when disabled."""
+    path = os.getenv('METRICS_FILE', DEFAULT_METRICS_FILE) if path is None else path
+    if not path:
+        return None
+    record = dict({'tool': tool}, **extra)
+    record.update(snapshot(tool))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    return path
+
+
+def instrumented(tool):
+    """Decorator for a tool's main(): times it as "total", honours PROFILE and writes metrics on exit."""
+    def decorate(main):
+        @functools.wraps(main)
+        def wrapper(*args, **kwargs):
+            started_at = datetime.now(timezone.utc).isoformat()
+            profiler = cProfile.Profile() if os.getenv('PROFILE') == '1' else None
+            status = 'ok'
+            try:
+                with span('total'):
+                    if profiler:
+                        return profiler.runcall(main, *args, **kwargs)
+                    return main(*args, **kwargs)
+            except SystemExit as e:
+                status = 'ok' if e.code in (None, 0) else f"exit {e.code}"
+                raise
+            except BaseException as e:
+                status = type(e).__name__
+                raise
+            finally:
+                if profiler:
+                    os.makedirs(PROFILE_DIR, exist_ok=True)
+                    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{tool}.prof"))
+                write_metrics(tool, started_at=started_at, exit=status)
+        return wrapper
+    return decorate
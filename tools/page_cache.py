@@ -0,0 +1,178 @@
+"""
+Content-addressed cache of raw scraped pages.
+
+Entries are keyed by (url, day). Each entry points at a snapshot stored under
+its SHA-256, so identical pages fetched on different runs share one file.
+While an entry is younger than its source's TTL the page is served from disk
+instead of paying the FireCrawl round trip again.
+
+Every snapshot written to .tmp/ gets a '<file>.meta.json' sidecar saying
+whether the content changed since the previous fetch, so parsers can skip
+work on unchanged pages (see snapshot_unchanged).
+
+Layout:
+  .tmp/cache/entries/<key>.json   url, day, source, sha256, fetched_at, previous_sha256
+  .tmp/cache/pages/<sha256>.md    page content
+
+Set PAGE_CACHE_TTL (seconds) to override the per-source TTL; 0 always refetches.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import date
+
+from metrics import count
+
+CACHE_DIR = '.tmp/cache'
+
+# Seconds a fetched page stays fresh, per source
+SOURCE_TTLS = {
+    'soccervista': 30 * 60,
+    'sportybet': 10 * 60,
+}
+
+
+def content_hash(content):
+    """SHA-256 hex digest of page content."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def cache_key(url, day):
+    """Entry key for a URL on a given day."""
+    return hashlib.sha256(f"{url}\n{day}".encode('utf-8')).hexdigest()
+
+
+def source_ttl(source):
+    """TTL in seconds for a source, honouring the PAGE_CACHE_TTL override."""
+    override = os.getenv('PAGE_CACHE_TTL')
+    if override:
+        return int(override)
+    return SOURCE_TTLS.get(source, 0)
+
+
+def _entry_path(cache_dir, key):
+    return os.path.join(cache_dir, 'entries', f"{key}.json")
+
+
+def _page_path(cache_dir, sha256):
+    return os.path.join(cache_dir, 'pages', f"{sha256}.md")
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def load_entry(url, day=None, cache_dir=CACHE_DIR):
+    """Return the cache entry dict for (url, day), or None."""
+    path = _entry_path(cache_dir, cache_key(url, day or date.today().isoformat()))
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def lookup(source, url, day=None, ttl=None, cache_dir=CACHE_DIR):
+    """Return (content, entry) if a fresh snapshot exists for (url, day), else None."""
+    entry = load_entry(url, day, cache_dir)
+    ttl = source_ttl(source) if ttl is None else ttl
+    if entry is None or time.time() - entry['fetched_at'] >= ttl:
+        count('page_cache_misses')
+        return None
+    page_path = _page_path(cache_dir, entry['sha256'])
+    if not os.path.exists(page_path):
+        count('page_cache_misses')
+        return None
+    count('page_cache_hits')
+    with open(page_path, 'r', encoding='utf-8') as f:
+        return f.read(), entry
+
+
+def store(source, url, content, day=None, cache_dir=CACHE_DIR):
+    """Store a freshly fetched page and return its entry (with a 'changed' flag)."""
+    day = day or date.today().isoformat()
+    sha256 = content_hash(content)
+    previous = load_entry(url, day, cache_dir)
+    previous_sha256 = previous['sha256'] if previous else None
+
+    page_path = _page_path(cache_dir, sha256)
+    if not os.path.exists(page_path):
+        _write_atomic(page_path, content)
+
+    entry = {
+        'source': source,
+        'url': url,
+        'day': day,
+        'sha256': sha256,
+        'fetched_at': time.time(),
+        'previous_sha256': previous_sha256,
+        'changed': sha256 != previous_sha256,
+    }
+    _write_atomic(_entry_path(cache_dir, cache_key(url, day)), json.dumps(entry, indent=2))
+    return entry
+
+
+def fetch_cached(source, url, scrape, day=None, ttl=None, cache_dir=CACHE_DIR):
+    """Return (content, info) for url, calling scrape(url) only when the cache is stale.
+
+    info has 'sha256', 'from_cache' and 'changed' (False when served from cache
+    or when a refetch returned the same content as the previous snapshot).
+    """
+    hit = lookup(source, url, day, ttl, cache_dir)
+    if hit is not None:
+        content, entry = hit
+        return content, {'sha256': entry['sha256'], 'from_cache': True, 'changed': False}
+
+    content = scrape(url)
+    entry = store(source, url, content, day, cache_dir)
+    return content, {'sha256': entry['sha256'], 'from_cache': False, 'changed': entry['changed']}
+
+
+def meta_path(path):
+    """Sidecar metadata path for a snapshot written to path."""
+    return f"{path}.meta.json"
+
+
+def write_snapshot(path, content, info):
+    """Write a page to path plus its sidecar metadata.
+
+    The page itself is only rewritten when its content differs from what is on
+    disk, so its mtime marks the last real change.
+    """
+    sha256 = info.get('sha256') or content_hash(content)
+    on_disk = None
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            on_disk = content_hash(f.read())
+    changed = on_disk != sha256
+    if changed:
+        _write_atomic(path, content)
+
+    meta = dict(info, sha256=sha256, changed=changed, written_at=time.time())
+    _write_atomic(meta_path(path), json.dumps(meta, indent=2))
+    return changed
+
+
+def snapshot_unchanged(path, outputs):
+    """True when path's last write reported no change and every output is newer than it.
+
+    Parsers use this to skip re-parsing a page whose derived outputs are current.
+    Deleting an output (or the sidecar) forces a re-parse.
+    """
+    if not os.path.exists(meta_path(path)) or not os.path.exists(path):
+        return False
+    with open(meta_path(path), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('changed', True):
+        return False
+    # Guard against the page being edited by hand after it was scraped
+    with open(path, 'r', encoding='utf-8') as f:
+        if content_hash(f.read()) != meta.get('sha256'):
+            return False
+    source_mtime = os.path.getmtime(path)
+    return all(os.path.exists(out) and os.path.getmtime(out) >= source_mtime for out in outputs)
@@ -7,9 +7,22 @@ Supports two SoccerVista formats:
   - Current: 1X2 column with [1], [X], or [2] predictions
 """
 
+import os
 import re
 import pandas as pd
 import sys
+from functools import lru_cache
+from itertools import islice
+from typing import NamedTuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from form_scoring import encode_forms, pack_form, unpack_form, win_probabilities
+from metrics import count, instrumented, span
+from page_cache import snapshot_unchanged
+from tables import table_path, write_table
+
+# Fixtures scored per batch by iter_matches
+SCORE_CHUNK_SIZE = 4096
 
 
 def parse_form(text):
@@ -55,12 +68,30 @@ def count_form(form_list):
     return w, d, l
 
 
+# Precompiled patterns for the line tokenizer
+LEAGUE_HEADER_RE = re.compile(
+    r'!\[Country flag\].*?\[([^\]]+)\]\(https://www\.soccervista\.com/([^/]+)/'
+)
+KICKOFF_RE = re.compile(r'\[(\d{2}:\d{2})\]')
+TIME_COLUMN_RE = re.compile(r'\[?\d{2}:\d{2}\]?')
+LEGACY_PREDICTION_RE = re.compile(r'10 on (\w+)')
+ONE_X_TWO_RE = re.compile(r'\[([12X])\]\(')
+LINK_MARKUP_RE = re.compile(r'\[|\]\([^\)]*\)')
+
+# Line classes produced by tokenize_line
+LINE_SKIP = 'skip'
+LINE_LEAGUE = 'league'
+LINE_FIXTURE = 'fixture'
+
+ONE_X_TWO_PREDICTIONS = {'1': 'HOME', '2': 'AWAY', 'X': 'DRAW'}
+
+
 def extract_team_and_form(col_text):
     """Extract team name and form from a column containing form+team data.
     Pattern: [L\\<br>\\<br>D\\<br>\\<br>W\\<br>\\<br>TeamName](url)
     or: [TeamName\\<br>\\<br>W\\<br>\\<br>D\\<br>\\<br>L](url)
     """
-    text = re.sub(r'\[|\]\([^\)]*\)', '', col_text)
+    text = LINK_MARKUP_RE.sub('', col_text)
     text = text.replace('\\<br>\\<br>', '|').replace('\\<br>', '|')
     parts = [p.strip() for p in text.split('|') if p.strip()]
     form_raw = [p for p in parts if p in ('W', 'D', 'L')]
@@ -69,105 +100,132 @@ def extract_team_and_form(col_text):
     return team_name, form_raw
 
 
-def parse_matches(filepath):
-    """Parse the scraped markdown file and extract match data."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+def has_form_data(text):
+    """Check for W/D/L form indicators around a \\<br> separator.
 
-    matches = []
-    current_league = ""
-    current_country = ""
+    Equivalent to re.search(r'[WDL].*\\<br>') or re.search(r'\\<br>.*[WDL]'):
+    the separator itself holds none of W/D/L, so any such letter sits either
+    before or after one.
+    """
+    return '\\<br>' in text and ('W' in text or 'D' in text or 'L' in text)
 
-    lines = content.split('\n')
 
-    for line in lines:
-        # Check for league header
-        league_match = re.search(
-            r'!\[Country flag\].*?\[([^\]]+)\]\(https://www\.soccervista\.com/([^/]+)/',
-            line
-        )
+def tokenize_line(line):
+    """Classify one markdown line as a league header, a fixture row or skip.
+
+    Returns one of:
+      (LINE_LEAGUE, (country, league))
+      (LINE_FIXTURE, (kickoff, home_col, away_col, prediction))
+      (LINE_SKIP, None)
+    """
+    # Check for league header
+    if '![Country flag]' in line:
+        league_match = LEAGUE_HEADER_RE.search(line)
         if league_match and '| ---' not in line and 'View details' not in line:
             league_info = league_match.group(1)
             country_slug = league_match.group(2)
             if ':' in league_info:
-                parts = league_info.split(':', 1)
-                current_country = parts[0].strip()
-                current_league = parts[1].strip()
-            else:
-                current_country = country_slug.replace('-', ' ').title()
-                current_league = league_info
+                country, league = league_info.split(':', 1)
+                return LINE_LEAGUE, (country.strip(), league.strip())
+            return LINE_LEAGUE, (country_slug.replace('-', ' ').title(), league_info)
+
+    # Skip rows without form data (W/D/L indicators)
+    if not has_form_data(line):
+        return LINE_SKIP, None
+
+    # Skip finished matches (FT) and live matches (with minute markers like 27')
+    # Only process upcoming matches with kickoff times
+    time_match = KICKOFF_RE.search(line)
+    if not time_match:
+        return LINE_SKIP, None
+    kickoff_time = time_match.group(1)
+
+    # Find form columns (home and away) and prediction in one pass over the columns
+    home_col = ''
+    away_col = ''
+    prediction = ''
+    one_x_two = ''
+
+    for col in line.split('|'):
+        col_stripped = col.strip()
+        if not col_stripped or col_stripped == '---':
             continue
 
-        # Skip rows without form data (W/D/L indicators)
-        if not re.search(r'[WDL].*\\<br>', line) and not re.search(r'\\<br>.*[WDL]', line):
+        # New format: first standalone [1], [X] or [2] column (not odds like [1.79])
+        if not one_x_two and col_stripped[0] == '[':
+            pred_match = ONE_X_TWO_RE.match(col_stripped)
+            if pred_match:
+                one_x_two = pred_match.group(1)
+
+        # Legacy format: "10 on XXX"
+        if '10 on' in col_stripped:
+            pred_match = LEGACY_PREDICTION_RE.search(col_stripped)
+            prediction = pred_match.group(1) if pred_match else ''
             continue
 
-        # Skip finished matches (FT) and live matches (with minute markers like 27')
-        # Only process upcoming matches with kickoff times
-        time_match = re.search(r'\[(\d{2}:\d{2})\]', line)
-        if not time_match:
+        if 'View details' in col_stripped:
             continue
-        kickoff_time = time_match.group(1)
-
-        # Split by | to get columns
-        cols = line.split('|')
-
-        # Find form columns (home and away) and prediction
-        home_col = ''
-        away_col = ''
-        prediction = ''
-
-        for col in cols:
-            col_stripped = col.strip()
-            if not col_stripped or col_stripped == '---':
-                continue
-
-            # Legacy format: "10 on XXX"
-            if '10 on' in col_stripped:
-                pred_match = re.search(r'10 on (\w+)', col_stripped)
-                prediction = pred_match.group(1) if pred_match else ''
-                continue
-
-            if 'View details' in col_stripped:
-                continue
-
-            # Skip time column
-            if re.search(r'^\[?\d{2}:\d{2}\]?', col_stripped) and not home_col:
-                continue
-
-            # Form+team columns
-            if re.search(r'[WDL].*\\<br>', col_stripped) or re.search(r'\\<br>.*[WDL]', col_stripped):
-                if not home_col:
-                    home_col = col_stripped
-                elif not away_col:
-                    away_col = col_stripped
-
-        if not home_col or not away_col:
+
+        # Skip time column
+        if not home_col and TIME_COLUMN_RE.match(col_stripped):
             continue
 
+        # Form+team columns
+        if has_form_data(col_stripped):
+            if not home_col:
+                home_col = col_stripped
+            elif not away_col:
+                away_col = col_stripped
+
+    if not home_col or not away_col:
+        return LINE_SKIP, None
+
+    # Legacy "10 on" takes precedence over the 1X2 column
+    if not prediction and one_x_two:
+        prediction = ONE_X_TWO_PREDICTIONS[one_x_two]
+
+    return LINE_FIXTURE, (kickoff_time, home_col, away_col, prediction)
+
+
+def iter_lines(path_or_fileobj):
+    """Yield lines (without the trailing newline) from a path or open text file, lazily."""
+    if hasattr(path_or_fileobj, 'read'):
+        for line in path_or_fileobj:
+            yield line.rstrip('\n')
+        return
+    with open(path_or_fileobj, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip('\n')
+
+
+def iter_fixtures(path_or_fileobj):
+    """Parse scraped markdown lazily, yielding one unscored fixture per win prediction.
+
+    Yields (fixture, predicted_form, opponent_form), where fixture is the
+    (country, league, kickoff, home_team, away_team, predicted_side) prefix of
+    a MatchRecord and the forms are raw W/D/L lists. iter_matches and
+    parse_matches turn these into MatchRecords.
+    """
+    current_league = ""
+    current_country = ""
+    lines_scanned = rows_parsed = 0
+
+    for lines_scanned, line in enumerate(iter_lines(path_or_fileobj), 1):
+        kind, payload = tokenize_line(line)
+        if kind == LINE_LEAGUE:
+            current_country, current_league = payload
+            continue
+        if kind != LINE_FIXTURE:
+            continue
+
+        kickoff_time, home_col, away_col, prediction = payload
+
         home_team, home_form_raw = extract_team_and_form(home_col)
         away_team, away_form_raw = extract_team_and_form(away_col)
 
         if not home_team or not away_team:
             continue
 
-        # Determine prediction - check for new format (1X2 column)
-        if not prediction:
-            # New format: look for standalone [1], [X], or [2] in the columns
-            # These appear after the away team column
-            for col in cols:
-                col_stripped = col.strip()
-                # Match exactly [1] or [2] (not odds like [1.79])
-                if re.match(r'^\[([12X])\]\(', col_stripped):
-                    pred_val = re.match(r'^\[([12X])\]', col_stripped).group(1)
-                    if pred_val == '1':
-                        prediction = 'HOME'
-                    elif pred_val == '2':
-                        prediction = 'AWAY'
-                    elif pred_val == 'X':
-                        prediction = 'DRAW'
-                    break
-
         # Skip draws - we only want win predictions
         if prediction == 'DRAW' or prediction == 'X':
             continue
@@ -205,42 +263,160 @@ def parse_matches(filepath):
         else:
             continue
 
-        win_prob = calculate_win_probability(predicted_form, opponent_form)
-        pw, pd_count, pl = count_form(predicted_form)
-        ow, od, ol = count_form(opponent_form)
-
-        matches.append({
-            'Country': current_country,
-            'League': current_league,
-            'Kickoff (UTC)': kickoff_time,
-            'Home Team': home_team,
-            'Away Team': away_team,
-            'Predicted Winner': predicted_team,
-            'Predicted Side': side,
-            'Winner Form (Last 5)': form_string(predicted_form),
-            'Winner W-D-L': f'{pw}-{pd_count}-{pl}',
-            'Opponent': opponent_team,
-            'Opponent Form (Last 5)': form_string(opponent_form),
-            'Opponent W-D-L': f'{ow}-{od}-{ol}',
-            'Win Probability %': win_prob,
-        })
-
-    return matches
+        rows_parsed += 1
+        fixture = (current_country, current_league, kickoff_time, home_team, away_team, side)
+        yield fixture, predicted_form, opponent_form
+
+    count('lines_scanned', lines_scanned)
+    count('rows_parsed', rows_parsed)
+
+
+class MatchRecord(NamedTuple):
+    """One parsed win prediction.
+
+    Form is kept as packed result codes (see form_scoring.pack_form) rather
+    than display strings; to_dict() and records_to_frame() build the
+    'W-W-L-D-W' / '3-1-1' columns only when a table is exported.
+    """
+    country: str
+    league: str
+    kickoff: str
+    home_team: str
+    away_team: str
+    predicted_side: str  # 'Home' or 'Away'
+    predicted_form: bytes
+    opponent_form: bytes
+    win_probability: float
+
+    @property
+    def predicted_winner(self):
+        return self.home_team if self.predicted_side == 'Home' else self.away_team
+
+    @property
+    def opponent(self):
+        return self.away_team if self.predicted_side == 'Home' else self.home_team
+
+    def to_dict(self):
+        """The record as one row of the SoccerVista table (display columns)."""
+        return {
+            'Country': self.country,
+            'League': self.league,
+            'Kickoff (UTC)': self.kickoff,
+            'Home Team': self.home_team,
+            'Away Team': self.away_team,
+            'Predicted Winner': self.predicted_winner,
+            'Predicted Side': self.predicted_side,
+            'Winner Form (Last 5)': form_display(self.predicted_form),
+            'Winner W-D-L': wdl_display(self.predicted_form),
+            'Opponent': self.opponent,
+            'Opponent Form (Last 5)': form_display(self.opponent_form),
+            'Opponent W-D-L': wdl_display(self.opponent_form),
+            'Win Probability %': self.win_probability,
+        }
+
+
+@lru_cache(maxsize=None)
+def form_display(packed):
+    """'W-D-L' display string for a packed form (few distinct forms, so cached)."""
+    return form_string(unpack_form(packed))
+
+
+@lru_cache(maxsize=None)
+def wdl_display(packed):
+    """'wins-draws-losses' display string for a packed form."""
+    w, d, l = count_form(unpack_form(packed))
+    return f'{w}-{d}-{l}'
+
+
+def records_to_frame(records):
+    """Build the SoccerVista table (same columns as MatchRecord.to_dict) column by column."""
+    records = list(records)
+    return pd.DataFrame({
+        'Country': [r.country for r in records],
+        'League': [r.league for r in records],
+        'Kickoff (UTC)': [r.kickoff for r in records],
+        'Home Team': [r.home_team for r in records],
+        'Away Team': [r.away_team for r in records],
+        'Predicted Winner': [r.predicted_winner for r in records],
+        'Predicted Side': [r.predicted_side for r in records],
+        'Winner Form (Last 5)': [form_display(r.predicted_form) for r in records],
+        'Winner W-D-L': [wdl_display(r.predicted_form) for r in records],
+        'Opponent': [r.opponent for r in records],
+        'Opponent Form (Last 5)': [form_display(r.opponent_form) for r in records],
+        'Opponent W-D-L': [wdl_display(r.opponent_form) for r in records],
+        'Win Probability %': pd.Series([r.win_probability for r in records], dtype='float64'),
+    })
+
+
+def score_fixtures(fixtures):
+    """MatchRecords for a list of (fixture, predicted_form, opponent_form), scored in one batch.
+
+    Form scoring is vectorized (see form_scoring.py); probabilities equal
+    calculate_win_probability's.
+    """
+    if not fixtures:
+        return []
+    predicted_forms = [predicted_form for _, predicted_form, _ in fixtures]
+    opponent_forms = [opponent_form for _, _, opponent_form in fixtures]
+    win_probs = win_probabilities(encode_forms(predicted_forms), encode_forms(opponent_forms))
+    return [
+        MatchRecord(*fixture, pack_form(predicted_form), pack_form(opponent_form), prob)
+        for (fixture, predicted_form, opponent_form), prob in zip(fixtures, win_probs.tolist())
+    ]
+
+
+def iter_matches(path_or_fileobj, chunk_size=SCORE_CHUNK_SIZE):
+    """Parse scraped markdown lazily, yielding one MatchRecord per fixture.
+
+    Accepts a file path or an open text file object. Lines are read one at a
+    time and fixtures are scored in batches of chunk_size, so memory stays
+    flat on large multi-day archives and consumers can start filtering before
+    the whole file has been read. Records are identical to parse_matches'.
+    """
+    fixtures = iter_fixtures(path_or_fileobj)
+    while True:
+        chunk = list(islice(fixtures, chunk_size))
+        if not chunk:
+            return
+        yield from score_fixtures(chunk)
+
+
+def parse_matches(filepath):
+    """Parse the scraped markdown file into a list of MatchRecords, scored in one batch."""
+    return score_fixtures(list(iter_fixtures(filepath)))
 
 
+@instrumented('parse_soccervista')
 def main():
-    filepath = sys.argv[1] if len(sys.argv) > 1 else '.tmp/soccervista_raw.md'
-    output = sys.argv[2] if len(sys.argv) > 2 else '.tmp/soccervista_predictions.xlsx'
+    # --force parses even an unchanged snapshot (e.g. after a code change)
+    force = '--force' in sys.argv[1:]
+    argv = [arg for arg in sys.argv[1:] if arg != '--force']
+    filepath = argv[0] if argv else '.tmp/soccervista_raw.md'
+    output = argv[1] if len(argv) > 1 else '.tmp/soccervista_predictions.xlsx'
+
+    full_output = output.replace('.xlsx', '_full.xlsx')
+
+    # Skip re-parsing when the scrape reported unchanged content and outputs are current
+    if not force and snapshot_unchanged(filepath, [output, full_output, table_path('soccervista_matches')]):
+        print(f"{filepath} unchanged since last parse; keeping {output}")
+        return
 
     print(f"Parsing: {filepath}")
-    matches = parse_matches(filepath)
+    with span('parse'):
+        matches = parse_matches(filepath)
     print(f"Total matches parsed: {len(matches)}")
 
     if not matches:
         print("No matches found!")
         return
 
-    df = pd.DataFrame(matches)
+    # Typed intermediate for downstream tools (match_games.py accepts it as input),
+    # kept in page order so it ranks exactly like a fresh parse
+    with span('export'):
+        df = records_to_frame(matches)
+        table_output = write_table(df, 'soccervista_matches')
+    print(f"Parsed matches table saved to: {table_output}")
+
     df = df.sort_values('Win Probability %', ascending=False)
 
     # Show all matches
@@ -259,12 +435,12 @@ def main():
               f"{row['Country']} - {row['League']}")
 
     # Save to Excel
-    filtered.to_excel(output, index=False, sheet_name='Predictions 60%+')
-    print(f"\nFiltered predictions saved to: {output}")
+    with span('export'):
+        filtered.to_excel(output, index=False, sheet_name='Predictions 60%+')
+        print(f"\nFiltered predictions saved to: {output}")
 
-    # Also save full dataset
-    full_output = output.replace('.xlsx', '_full.xlsx')
-    df.to_excel(full_output, index=False, sheet_name='All Predictions')
+        # Also save full dataset
+        df.to_excel(full_output, index=False, sheet_name='All Predictions')
     print(f"Full dataset saved to: {full_output}")
 
 
@@ -1,18 +1,55 @@
 """
 Parse sportybet scraped markdown data into structured match list.
-Extracts:
+Extracts, in a single streaming pass over the page:
   1. Sidebar leagues (country + league name + game count) for league-level matching
   2. Match details (home/away teams) from the main content area
 """
 
+import io
 import re
 import sys
 import os
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from metrics import count, instrumented, span
+from page_cache import snapshot_unchanged
+from tables import table_path, write_table
+
+
+# Precompiled patterns for the single-pass parser
+SIDEBAR_COUNTRY_RE = re.compile(r'^-\s+([A-Za-z\s&,]+?)(\d+)\s*$')
+SIDEBAR_LEAGUE_RE = re.compile(r'^-\s+(.+?)\((\d+)\)\s*$')
+# League headers contain unicode icon chars between underscores: _\ue6a3_League Name
+LEAGUE_HEADER_RE = re.compile(r'^_[^\w\s]*_(.+)$')
+DATE_HEADER_RE = re.compile(r'^(\d{2}/\d{2})\s+\w+day$')
+MATCH_ID_RE = re.compile(r'^ID:\s*(\d+)$')
+KICKOFF_RE = re.compile(r'^(\d{2}:\d{2})$')
+ODDS_RE = re.compile(r'^[\d.]+$')
+
+# Sidebar entries that are filters, not countries or leagues
+SIDEBAR_NON_COUNTRIES = ('Odds Filter', 'A-Z', 'Odd/Even')
+SIDEBAR_NON_LEAGUES = ('10 options is the maximum allowed',)
+# Lines that end a match's team list
+TEAM_LIST_END = ('View All', 'Matches', 'Outrights')
+# A kickoff time belongs to a match ID at most this many lines below it
+KICKOFF_LOOKBACK = 4
+
+
+def iter_lines(path_or_fileobj):
+    """Yield lines from a path or an open text file, one at a time."""
+    if hasattr(path_or_fileobj, 'read'):
+        yield from path_or_fileobj
+        return
+    with open(path_or_fileobj, 'r', encoding='utf-8') as f:
+        yield from f
 
-def parse_sidebar_leagues(content):
-    """Extract all available leagues from the SportyBet sidebar.
+
+def parse_sportybet_page(path_or_fileobj):
+    """Parse sidebar leagues and match details from a SportyBet page in one pass.
+
+    Returns (sidebar_leagues, matches). Lines are streamed, and the sidebar and
+    match-detail state machines both consume each line:
 
     Sidebar format:
     - Country<count>
@@ -22,162 +59,150 @@ def parse_sidebar_leagues(content):
     - England80
       - Premier League(22)
       - Championship(15)
+
+    Match details sit under a league header (_<icon>_England Premier League)
+    and a date header (21/02 Saturday). Each match has a kickoff line, an
+    'ID: <n>' line, then the home and away team lines. The latest kickoff is
+    carried forward, so the ID line does not need to look back for it.
     """
     leagues = []
-    lines = content.split('\n')
+    matches = []
     current_country = None
+    current_league = None
+    current_date = None
+    kickoff, kickoff_line = '', None
+    # Match whose team lines are being read: [match_id, kickoff, teams]
+    pending = None
+    line_no = -1
 
-    for line in lines:
+    for line_no, line in enumerate(iter_lines(path_or_fileobj)):
         stripped = line.strip()
 
+        # --- Sidebar leagues ---
         # Country header: "- England80" or "- Brazil111"
-        country_match = re.match(r'^-\s+([A-Za-z\s&,]+?)(\d+)\s*$', stripped)
+        country_match = SIDEBAR_COUNTRY_RE.match(stripped)
         if country_match:
             current_country = country_match.group(1).strip()
             # Skip non-country entries
-            if current_country in ('Odds Filter', 'A-Z', 'Odd/Even'):
+            if current_country in SIDEBAR_NON_COUNTRIES:
                 current_country = None
-                continue
-            continue
-
-        # League entry: "  - Premier League(22)" or "  - Serie A(18)"
-        league_match = re.match(r'^-\s+(.+?)\((\d+)\)\s*$', stripped)
-        if league_match and current_country:
-            league_name = league_match.group(1).strip()
-            game_count = int(league_match.group(2))
-            # Skip filter/structural entries
-            if league_name in ('10 options is the maximum allowed',):
-                continue
-            leagues.append({
-                'sb_country': current_country,
-                'sb_league_name': league_name,
-                'sb_full_league': f"{current_country} {league_name}",
-                'sb_game_count': game_count,
-            })
-
-        # Reset country on non-indented, non-matching lines
-        if stripped and not stripped.startswith('-') and not stripped.startswith('10 options'):
-            if not re.match(r'^-\s+', stripped):
+        else:
+            # League entry: "  - Premier League(22)" or "  - Serie A(18)"
+            league_match = SIDEBAR_LEAGUE_RE.match(stripped) if current_country else None
+            if league_match:
+                league_name = league_match.group(1).strip()
+                # Skip filter/structural entries
+                if league_name not in SIDEBAR_NON_LEAGUES:
+                    leagues.append({
+                        'sb_country': current_country,
+                        'sb_league_name': league_name,
+                        'sb_full_league': f"{current_country} {league_name}",
+                        'sb_game_count': int(league_match.group(2)),
+                    })
+            # Reset country on non-indented, non-matching lines
+            if stripped and not stripped.startswith('-') and not stripped.startswith('10 options'):
                 current_country = None
 
-    return leagues
+        # --- Match details ---
+        consumed = False
+        if pending is not None and stripped:
+            # The next two non-empty lines are the home and away teams
+            if ODDS_RE.match(stripped) or stripped.startswith('ID:') or stripped in TEAM_LIST_END:
+                # Team list ended early: drop the match and treat this line normally
+                pending = None
+            else:
+                consumed = True
+                pending[2].append(stripped)
+                if len(pending[2]) == 2:
+                    match_id, match_kickoff, (home, away) = pending
+                    matches.append({
+                        'sb_league': current_league,
+                        'sb_home_team': home,
+                        'sb_away_team': away,
+                        'sb_kickoff': match_kickoff,
+                        'sb_date': current_date or '',
+                        'sb_match_id': match_id,
+                    })
+                    pending = None
+
+        if not consumed and pending is None and stripped:
+            # Detect league headers like: _<icon>_England Premier League
+            league_match = LEAGUE_HEADER_RE.match(stripped)
+            if league_match:
+                league_text = league_match.group(1).strip()
+                if not league_text.startswith('Live'):
+                    current_league = league_text
+            else:
+                # Detect date headers like: 21/02 Saturday, 14/02 Saturday
+                date_match = DATE_HEADER_RE.match(stripped)
+                if date_match:
+                    current_date = date_match.group(1)
+                else:
+                    # Detect match entries by ID line pattern
+                    id_match = MATCH_ID_RE.match(stripped)
+                    if id_match and current_league:
+                        recent = kickoff_line is not None and line_no - kickoff_line <= KICKOFF_LOOKBACK
+                        pending = [id_match.group(1), kickoff if recent else '', []]
+
+        # Carry the latest kickoff forward for the next match ID
+        line_kickoff = KICKOFF_RE.match(stripped)
+        if line_kickoff:
+            kickoff, kickoff_line = line_kickoff.group(1), line_no
+
+    count('lines_scanned', line_no + 1)
+    count('rows_parsed', len(leagues) + len(matches))
+    return leagues, matches
 
 
-def parse_sportybet_markdown(filepath):
-    """Parse FireCrawl markdown output from SportyBet into match records."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+def parse_sidebar_leagues(content):
+    """Extract all available leagues from the SportyBet sidebar (content is the page text)."""
+    return parse_sportybet_page(io.StringIO(content))[0]
 
-    lines = content.split('\n')
-    matches = []
-    current_league = None
-    current_date = None
 
-    # League headers contain unicode icon chars between underscores: _\ue6a3_League Name
-    league_pattern = re.compile(r'^_[^\w\s]*_(.+)$')
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-
-        # Detect league headers like: _<icon>_England Premier League
-        league_match = league_pattern.match(line)
-        if league_match:
-            league_text = league_match.group(1).strip()
-            if not league_text.startswith('Live'):
-                current_league = league_text
-            i += 1
-            continue
-
-        # Detect date headers like: 21/02 Saturday, 14/02 Saturday
-        date_match = re.match(r'^(\d{2}/\d{2})\s+\w+day$', line)
-        if date_match:
-            current_date = date_match.group(1)
-            i += 1
-            continue
-
-        # Detect match entries by ID line pattern
-        id_match = re.match(r'^ID:\s*(\d+)$', line)
-        if id_match and current_league:
-            match_id = id_match.group(1)
-
-            # Look backward for kickoff time
-            kickoff = ''
-            for back in range(1, 5):
-                prev = lines[i - back].strip() if i - back >= 0 else ''
-                time_match = re.match(r'^(\d{2}:\d{2})$', prev)
-                if time_match:
-                    kickoff = time_match.group(1)
-                    break
-
-            # Next two non-empty lines are home and away teams
-            teams = []
-            k = i + 1
-            while k < len(lines) and len(teams) < 2:
-                team_line = lines[k].strip()
-                if team_line:
-                    if re.match(r'^[\d.]+$', team_line):
-                        break
-                    if re.match(r'^ID:', team_line):
-                        break
-                    if team_line in ('View All', 'Matches', 'Outrights'):
-                        break
-                    teams.append(team_line)
-                k += 1
-
-            if len(teams) == 2:
-                matches.append({
-                    'sb_league': current_league,
-                    'sb_home_team': teams[0],
-                    'sb_away_team': teams[1],
-                    'sb_kickoff': kickoff,
-                    'sb_date': current_date or '',
-                    'sb_match_id': match_id,
-                })
-            i = k
-            continue
-
-        i += 1
-
-    return matches
+def parse_sportybet_markdown(filepath):
+    """Parse FireCrawl markdown output from SportyBet into match records."""
+    return parse_sportybet_page(filepath)[1]
 
 
+@instrumented('parse_sportybet')
 def main():
-    filepath = sys.argv[1] if len(sys.argv) > 1 else '.tmp/sportybet_raw.md'
+    # --force parses even an unchanged snapshot (e.g. after a code change)
+    force = '--force' in sys.argv[1:]
+    argv = [arg for arg in sys.argv[1:] if arg != '--force']
+    filepath = argv[0] if argv else '.tmp/sportybet_raw.md'
 
     if not os.path.exists(filepath):
         print(f"Error: {filepath} not found. Run scrape_sportybet.py first.")
         sys.exit(1)
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Skip re-parsing when the scrape reported unchanged content and outputs are current
+    outputs = [table_path('sportybet_leagues'), table_path('sportybet_games')]
+    if not force and snapshot_unchanged(filepath, outputs):
+        print(f"{filepath} unchanged since last parse; keeping {', '.join(outputs)}")
+        return
 
-    # Parse sidebar leagues
-    sidebar_leagues = parse_sidebar_leagues(content)
+    # Sidebar leagues and match details come out of one pass over the page
+    with span('parse'):
+        sidebar_leagues, matches = parse_sportybet_page(filepath)
     if sidebar_leagues:
         sidebar_df = pd.DataFrame(sidebar_leagues)
-        sidebar_output = '.tmp/sportybet_leagues.csv'
-        sidebar_df.to_csv(sidebar_output, index=False)
+        with span('export'):
+            sidebar_output = write_table(sidebar_df, 'sportybet_leagues')
         print(f"Parsed {len(sidebar_leagues)} sidebar leagues -> {sidebar_output}")
         print(f"  Countries: {sidebar_df['sb_country'].nunique()}")
         total_games = sidebar_df['sb_game_count'].sum()
         print(f"  Total games across all leagues: {total_games}")
 
-    # Parse match details
-    matches = parse_sportybet_markdown(filepath)
-
-    os.makedirs('.tmp', exist_ok=True)
-
     if matches:
         df = pd.DataFrame(matches)
-        output = '.tmp/sportybet_games.csv'
-        df.to_csv(output, index=False)
+        with span('export'):
+            output = write_table(df, 'sportybet_games')
 
         print(f"\nParsed {len(matches)} match details -> {output}")
         print(f"  Leagues with details: {df['sb_league'].nunique()}")
         for league in df['sb_league'].unique():
-            count = len(df[df['sb_league'] == league])
-            print(f"    {league}: {count} games")
+            games = len(df[df['sb_league'] == league])
+            print(f"    {league}: {games} games")
     else:
         print("\nNo match details parsed (only sidebar leagues available).")
 
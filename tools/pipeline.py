@@ -0,0 +1,303 @@
+"""
+Run the whole prediction pipeline as a dependency graph.
+
+  scrape_soccervista --> parse_soccervista --\
+                                              +--> match_games --> csv_to_json
+  scrape_sportybet   --> parse_sportybet   --/
+
+Each stage is one of the existing tools run as a subprocess. Stages start as
+soon as their dependencies finish, so the two scrapes and the two parses run
+concurrently.
+
+Before running a stage, its fingerprint is computed from the stage's command
+line, the source of the tool and of every tools/ module it imports, and the
+content of its input files. match_games also depends on the raw SoccerVista
+snapshot (its match date) and on the alias store (ALIAS_DB), so editing an
+alias with alias_store.py re-runs it. A stage whose fingerprint matches the
+last successful run and whose outputs all exist is skipped, and so a refresh
+where only one site changed only redoes that site's branch plus the final
+match and export. Scrapes always run, but they
+go through the page cache (page_cache.py) and cost nothing while a page is
+fresh. The parsers skip themselves when their snapshot is unchanged, which
+knows nothing about code changes or --force, so the pipeline runs them with
+--force whenever it decides they must run.
+
+Fingerprints are kept in .tmp/pipeline_state.json. Each stage's output is
+written to .tmp/logs/<stage>.log.
+
+Usage:
+  python3 tools/pipeline.py [--force] [--no-scrape] [--jobs 4] [--dry-run]
+"""
+
+import argparse
+import ast
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from alias_store import DEFAULT_ALIAS_DB
+from combine_predictions import infer_snapshot_date
+from metrics import count, instrumented, span
+from tables import table_path
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = '.tmp/pipeline_state.json'
+LOG_DIR = '.tmp/logs'
+WEBSITE_JSON = 'website/public/data/predictions.json'
+WEBSITE_SHARD_DIR = 'website/public/data/predictions'
+# Same resolution as match_games.py; empty disables the store
+ALIAS_DB = os.getenv('ALIAS_DB', DEFAULT_ALIAS_DB)
+
+# name -> tool script, arguments, upstream stages, input files, output files.
+# 'always' stages ignore fingerprints (the scrapes rely on the page cache instead).
+# 'force_args' are added whenever the pipeline runs the stage; they are not fingerprinted.
+# 'dated_by' adds that snapshot's inferred match date to the fingerprint (the same
+# content scraped on another day is another match date).
+# 'updates_inputs' stages write one of their inputs (match_games records aliases), so
+# their fingerprint is taken after the run instead of before.
+STAGES = {
+    'scrape_soccervista': {
+        'tool': 'scrape_soccervista.py',
+        'args': [],
+        'deps': [],
+        'inputs': [],
+        'outputs': ['.tmp/soccervista_raw.md'],
+        'always': True,
+    },
+    'scrape_sportybet': {
+        'tool': 'scrape_sportybet.py',
+        'args': [],
+        'deps': [],
+        'inputs': [],
+        'outputs': ['.tmp/sportybet_raw.md'],
+        'always': True,
+    },
+    'parse_soccervista': {
+        'tool': 'parse_soccervista.py',
+        'args': ['.tmp/soccervista_raw.md', '.tmp/soccervista_predictions.xlsx'],
+        'deps': ['scrape_soccervista'],
+        'inputs': ['.tmp/soccervista_raw.md'],
+        'outputs': [table_path('soccervista_matches'), '.tmp/soccervista_predictions.xlsx',
+                    '.tmp/soccervista_predictions_full.xlsx'],
+        'force_args': ['--force'],
+    },
+    'parse_sportybet': {
+        'tool': 'parse_sportybet.py',
+        'args': ['.tmp/sportybet_raw.md'],
+        'deps': ['scrape_sportybet'],
+        'inputs': ['.tmp/sportybet_raw.md'],
+        'outputs': [table_path('sportybet_leagues'), table_path('sportybet_games')],
+        'force_args': ['--force'],
+    },
+    'match_games': {
+        'tool': 'match_games.py',
+        # The parsed table is dated from the raw snapshot it came from, not its own mtime
+        'args': [table_path('soccervista_matches'), table_path('sportybet_games'),
+                 '--snapshot', '.tmp/soccervista_raw.md'],
+        'deps': ['parse_soccervista', 'parse_sportybet'],
+        'inputs': [table_path('soccervista_matches'), table_path('sportybet_leagues'),
+                   table_path('sportybet_games'), '.tmp/soccervista_raw.md']
+                  + ([ALIAS_DB] if ALIAS_DB else []),
+        'outputs': [table_path('matched_predictions'), 'matched_predictions.xlsx',
+                    'matched_predictions.csv'],
+        'dated_by': '.tmp/soccervista_raw.md',
+        'updates_inputs': True,
+    },
+    'csv_to_json': {
+        'tool': 'csv_to_json.py',
+        'args': [table_path('matched_predictions'), WEBSITE_JSON, '--shard-dir', WEBSITE_SHARD_DIR],
+        'deps': ['match_games'],
+        'inputs': [table_path('matched_predictions')],
+        'outputs': [WEBSITE_JSON, os.path.join(WEBSITE_SHARD_DIR, 'manifest.json')],
+    },
+}
+
+DEFAULT_JOBS = 4
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def tool_sources(tool):
+    """File names of a tool script and of every tools/ module it imports, directly or not.
+
+    Imports inside functions count too (e.g. match_games.py loading
+    combine_predictions), so the list errs on the side of too many files.
+    """
+    seen, pending = set(), [tool]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(TOOLS_DIR, name), 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                source = f"{module.split('.')[0]}.py"
+                if os.path.exists(os.path.join(TOOLS_DIR, source)):
+                    pending.append(source)
+    return sorted(seen)
+
+
+def fingerprint(stage):
+    """Hash of everything that determines a stage's outputs: command, code, inputs, match date."""
+    parts = {
+        'args': stage['args'],
+        'tool': {name: file_digest(os.path.join(TOOLS_DIR, name)) for name in tool_sources(stage['tool'])},
+        'inputs': {path: file_digest(path) for path in stage['inputs']},
+    }
+    dated_by = stage.get('dated_by')
+    if dated_by and os.path.exists(dated_by):
+        parts['match_date'] = infer_snapshot_date(dated_by).isoformat()
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_current(name, stage, state):
+    """Return (current, fingerprint): current when the last successful run had the same inputs."""
+    if stage.get('always'):
+        return False, None
+    fp = fingerprint(stage)
+    current = state.get(name) == fp and all(os.path.exists(out) for out in stage['outputs'])
+    return current, fp
+
+
+async def run_tool(name, stage):
+    """Run a stage's tool as a subprocess, logging to LOG_DIR. Returns the exit code."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{name}.log")
+    with open(log_path, 'wb') as log:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(TOOLS_DIR, stage['tool']), *stage['args'], *stage.get('force_args', []),
+            stdout=log, stderr=asyncio.subprocess.STDOUT,
+        )
+        return await proc.wait()
+
+
+async def run_pipeline(stages, state, jobs=DEFAULT_JOBS, force=False, skip=()):
+    """Run stages in dependency order, independent stages concurrently.
+
+    Returns {stage name: status} where status is 'ran', 'skipped', 'failed' or
+    'blocked' (an upstream stage failed). state is updated in place with the
+    fingerprint of every stage that ran successfully.
+    """
+    semaphore = asyncio.Semaphore(jobs)
+    tasks = {}
+    statuses = {}
+
+    async def run_stage(name):
+        stage = stages[name]
+        upstream = [await tasks[dep] for dep in stage['deps']]
+        if any(status in ('failed', 'blocked') for status in upstream):
+            statuses[name] = 'blocked'
+            print(f"  [{name}] blocked (upstream stage failed)")
+            return statuses[name]
+        if name in skip:
+            statuses[name] = 'skipped'
+            print(f"  [{name}] skipped (disabled)")
+            return statuses[name]
+
+        # Fingerprint after the upstream stages finished, so it sees their fresh outputs
+        current, fp = is_current(name, stage, state)
+        if current and not force:
+            statuses[name] = 'skipped'
+            count('stages_skipped')
+            print(f"  [{name}] skipped (inputs unchanged)")
+            return statuses[name]
+
+        async with semaphore:
+            start = time.monotonic()
+            print(f"  [{name}] running")
+            returncode = await run_tool(name, stage)
+            elapsed = time.monotonic() - start
+
+        if returncode != 0:
+            statuses[name] = 'failed'
+            count('stages_failed')
+            print(f"  [{name}] FAILED (exit {returncode}, {elapsed:.1f}s) - see {LOG_DIR}/{name}.log")
+            return statuses[name]
+
+        if fp is not None:
+            # A stage that wrote its own inputs is current with what it left behind
+            state[name] = fingerprint(stage) if stage.get('updates_inputs') else fp
+        statuses[name] = 'ran'
+        count('stages_run')
+        print(f"  [{name}] done ({elapsed:.1f}s)")
+        return statuses[name]
+
+    # Stages are declared in dependency order, so every dep task exists before it is awaited
+    for name in stages:
+        tasks[name] = asyncio.ensure_future(run_stage(name))
+    await asyncio.gather(*tasks.values())
+    return statuses
+
+
+@instrumented('pipeline')
+def main():
+    parser = argparse.ArgumentParser(description="Run the prediction pipeline, skipping unchanged stages")
+    parser.add_argument('--force', action='store_true', help="Run every stage even if its inputs are unchanged")
+    parser.add_argument('--no-scrape', action='store_true', help="Use the pages already in .tmp/")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help="Maximum stages running at once")
+    parser.add_argument('--dry-run', action='store_true', help="Show which stages would run")
+    args = parser.parse_args()
+
+    skip = {name for name in STAGES if name.startswith('scrape_')} if args.no_scrape else set()
+    state = load_state()
+
+    if args.dry_run:
+        # Without running upstream stages, a stage's inputs may still change; this is the plan as of now
+        for name, stage in STAGES.items():
+            current, _ = is_current(name, stage, state)
+            action = 'skip' if name in skip or (current and not args.force) else 'run'
+            print(f"  [{name}] {action}")
+        return
+
+    print(f"Running pipeline ({args.jobs} job(s){', forced' if args.force else ''})")
+    start = time.monotonic()
+    with span('pipeline'):
+        statuses = asyncio.run(run_pipeline(STAGES, state, jobs=args.jobs, force=args.force, skip=skip))
+    save_state(state)
+
+    ran = sum(1 for s in statuses.values() if s == 'ran')
+    skipped = sum(1 for s in statuses.values() if s == 'skipped')
+    failed = sum(1 for s in statuses.values() if s in ('failed', 'blocked'))
+    print(f"\nDone in {time.monotonic() - start:.1f}s: {ran} ran, {skipped} skipped, {failed} failed/blocked")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Fetch several SoccerVista days and SportyBet pages concurrently.
+
+The single-page scrapers block on FireCrawl's JS wait (5s / 10s) one URL per
+process. This runner schedules all pages on an asyncio event loop with a
+global concurrency limit and a minimum interval between requests to the same
+host, then writes each page to .tmp/ as markdown.
+
+Output names:
+  default SoccerVista page  -> .tmp/soccervista_raw.md
+  default SportyBet page    -> .tmp/sportybet_raw.md
+  any other page            -> .tmp/<source>_<url path slug>.md
+
+Pages go through the page cache (page_cache.py): a URL fetched recently today
+is served from .tmp/cache, and each output gets a '.meta.json' sidecar saying
+whether its content changed. Pass --no-cache to always refetch.
+
+The fetch backend is pluggable: an async callable (source, url) -> markdown.
+"firecrawl" uses the existing scrape tools; "http" does a plain GET, which is
+handy against a local stub server.
+
+Usage:
+  python3 tools/scrape_runner.py --soccervista URL [URL ...] --sportybet URL [URL ...]
+      [--concurrency 4] [--min-interval 1.0] [--backend firecrawl|http] [--out-dir .tmp] [--no-cache]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from metrics import count, instrumented, span
+from page_cache import lookup, store, write_snapshot
+
+DEFAULT_URLS = {
+    'soccervista': 'https://www.soccervista.com',
+    'sportybet': 'https://www.sportybet.com/ng/sport/football',
+}
+
+DEFAULT_CONCURRENCY = 4
+# Minimum seconds between two requests to the same host
+DEFAULT_MIN_INTERVAL = 1.0
+HTTP_TIMEOUT = 60
+
+
+def output_name(source, url):
+    """File name for a scraped page (default pages keep their historical names)."""
+    if url.rstrip('/') == DEFAULT_URLS[source].rstrip('/'):
+        return f"{source}_raw.md"
+    parts = urlparse(url)
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', f"{parts.path}_{parts.query}").strip('_')
+    return f"{source}_{slug or 'raw'}.md"
+
+
+async def firecrawl_backend(source, url):
+    """Fetch through FireCrawl using the existing single-page scrapers (run in a thread)."""
+    if source == 'soccervista':
+        from scrape_soccervista import scrape_predictions as scrape
+    else:
+        from scrape_sportybet import scrape_sportybet as scrape
+    return await asyncio.to_thread(scrape, url)
+
+
+async def http_backend(source, url):
+    """Plain HTTP GET (no JS rendering), e.g. against a local stub server."""
+    def get():
+        with urllib.request.urlopen(url, timeout=HTTP_TIMEOUT) as resp:
+            return resp.read().decode('utf-8', errors='replace')
+    return await asyncio.to_thread(get)
+
+
+BACKENDS = {
+    'firecrawl': firecrawl_backend,
+    'http': http_backend,
+}
+
+
+def host_rate_limiter(min_interval):
+    """Return an async wait(host) that spaces request starts per host by min_interval seconds."""
+    locks = {}
+    last_start = {}
+
+    async def wait(host):
+        lock = locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = last_start.get(host, float('-inf')) + min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            last_start[host] = time.monotonic()
+
+    return wait
+
+
+async def run_scrapes(jobs, fetch=firecrawl_backend, concurrency=DEFAULT_CONCURRENCY,
+                      min_interval=DEFAULT_MIN_INTERVAL, out_dir='.tmp', use_cache=True):
+    """Fetch (source, url) jobs concurrently and write each page to out_dir.
+
+    Returns one result dict per job, in job order, with 'source', 'url', 'path',
+    'chars', 'seconds', 'from_cache', 'changed' and 'error' (None on success).
+    A failed page does not stop the others.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+    wait_for_host = host_rate_limiter(min_interval)
+
+    async def run_one(source, url):
+        path = os.path.join(out_dir, output_name(source, url))
+        result = {'source': source, 'url': url, 'path': path, 'chars': 0, 'seconds': 0.0,
+                  'from_cache': False, 'changed': False, 'error': None}
+        if use_cache:
+            hit = lookup(source, url)
+            if hit is not None:
+                # Fresh in the cache: no slot or rate-limit wait needed
+                content, entry = hit
+                result.update(chars=len(content), from_cache=True, changed=write_snapshot(
+                    path, content, {'sha256': entry['sha256'], 'from_cache': True}))
+                return result
+        async with semaphore:
+            await wait_for_host(urlparse(url).netloc)
+            start = time.monotonic()
+            try:
+                content = await fetch(source, url)
+                if use_cache:
+                    entry = store(source, url, content)
+                    info = {'sha256': entry['sha256'], 'from_cache': False}
+                else:
+                    info = {'from_cache': False}
+                result['changed'] = write_snapshot(path, content, info)
+                result['chars'] = len(content)
+            except Exception as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['seconds'] = round(time.monotonic() - start, 2)
+        return result
+
+    return await asyncio.gather(*(run_one(source, url) for source, url in jobs))
+
+
+@instrumented('scrape_runner')
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-page scraper")
+    parser.add_argument('--soccervista', nargs='*', default=[], metavar='URL',
+                        help="SoccerVista day URLs")
+    parser.add_argument('--sportybet', nargs='*', default=[], metavar='URL',
+                        help="SportyBet league/football page URLs")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--min-interval', type=float, default=DEFAULT_MIN_INTERVAL,
+                        help="Minimum seconds between requests to the same host")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='firecrawl')
+    parser.add_argument('--out-dir', default='.tmp')
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached pages and refetch")
+    args = parser.parse_args()
+
+    jobs = [('soccervista', url) for url in args.soccervista]
+    jobs += [('sportybet', url) for url in args.sportybet]
+    if not jobs:
+        jobs = [('soccervista', DEFAULT_URLS['soccervista']), ('sportybet', DEFAULT_URLS['sportybet'])]
+
+    print(f"Scraping {len(jobs)} page(s) (concurrency {args.concurrency}, backend {args.backend})")
+    start = time.monotonic()
+    with span('scrape'):
+        results = asyncio.run(run_scrapes(
+            jobs, fetch=BACKENDS[args.backend], concurrency=args.concurrency,
+            min_interval=args.min_interval, out_dir=args.out_dir, use_cache=not args.no_cache,
+        ))
+
+    failed = 0
+    for r in results:
+        if r['error']:
+            failed += 1
+            print(f"  FAILED {r['url']}: {r['error']}")
+        else:
+            origin = 'cache' if r['from_cache'] else f"{r['seconds']}s"
+            state = 'changed' if r['changed'] else 'unchanged'
+            print(f"  {r['url']} -> {r['path']} ({r['chars']} chars, {origin}, {state})")
+    count('pages_scraped', len(results) - failed)
+    count('pages_failed', failed)
+    print(f"\nDone in {time.monotonic() - start:.1f}s: {len(results) - failed} ok, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
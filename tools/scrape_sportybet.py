@@ -8,6 +8,10 @@ import sys
 from dotenv import load_dotenv
 from firecrawl import FirecrawlApp
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from metrics import instrumented, span
+from page_cache import fetch_cached, write_snapshot
+
 load_dotenv()
 
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
@@ -22,18 +26,21 @@ def scrape_sportybet(url: str) -> str:
     )
     return getattr(result, "markdown", str(result))
 
+@instrumented("scrape_sportybet")
 def main():
     url = sys.argv[1] if len(sys.argv) > 1 else "https://www.sportybet.com/ng/sport/football"
     print(f"Scraping: {url}")
-    content = scrape_sportybet(url)
+    # Served from .tmp/cache while the last fetch of this URL today is fresh
+    with span("scrape"):
+        content, info = fetch_cached("sportybet", url, scrape_sportybet)
 
     # Save raw output
     os.makedirs(".tmp", exist_ok=True)
     output_path = ".tmp/sportybet_raw.md"
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(content)
+    changed = write_snapshot(output_path, content, info)
 
-    print(f"Content saved to {output_path}")
+    source = "cache" if info["from_cache"] else "FireCrawl"
+    print(f"Content saved to {output_path} (from {source}, {'changed' if changed else 'unchanged'})")
     print(f"Content length: {len(content)} chars")
     # Print first 3000 chars as preview
     print("\n--- PREVIEW ---")
@@ -0,0 +1,115 @@
+"""
+Typed columnar intermediate format for data handed between tools.
+
+Intermediate tables in .tmp/ are Arrow IPC files with explicit schemas, so
+downstream tools read typed columns back without re-parsing text or guessing
+dtypes. Excel/CSV files are only written as final exports.
+
+Tables:
+  soccervista_matches   parse_soccervista.py -> match_games.py (optional input)
+  sportybet_leagues     parse_sportybet.py   -> match_games.py
+  sportybet_games       parse_sportybet.py   -> match_games.py
+  matched_predictions   match_games.py       -> csv_to_json.py
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+SOCCERVISTA_COLUMNS = [
+    ('Country', pa.string()),
+    ('League', pa.string()),
+    ('Kickoff (UTC)', pa.string()),
+    ('Home Team', pa.string()),
+    ('Away Team', pa.string()),
+    ('Predicted Winner', pa.string()),
+    ('Predicted Side', pa.string()),
+    ('Winner Form (Last 5)', pa.string()),
+    ('Winner W-D-L', pa.string()),
+    ('Opponent', pa.string()),
+    ('Opponent Form (Last 5)', pa.string()),
+    ('Opponent W-D-L', pa.string()),
+    ('Win Probability %', pa.float64()),
+]
+
+SCHEMAS = {
+    'soccervista_matches': pa.schema(SOCCERVISTA_COLUMNS),
+    'sportybet_leagues': pa.schema([
+        ('sb_country', pa.string()),
+        ('sb_league_name', pa.string()),
+        ('sb_full_league', pa.string()),
+        ('sb_game_count', pa.int32()),
+    ]),
+    'sportybet_games': pa.schema([
+        ('sb_league', pa.string()),
+        ('sb_home_team', pa.string()),
+        ('sb_away_team', pa.string()),
+        ('sb_kickoff', pa.string()),
+        ('sb_date', pa.string()),
+        ('sb_match_id', pa.string()),
+    ]),
+    'matched_predictions': pa.schema(
+        [('Rank', pa.int32()), ('Match Date', pa.string())] + SOCCERVISTA_COLUMNS + [
+            ('SportyBet League', pa.string()),
+            ('SportyBet Home', pa.string()),
+            ('SportyBet Away', pa.string()),
+            ('League Match %', pa.float64()),
+            ('Team Match %', pa.float64()),
+            ('Match Type', pa.string()),
+        ]
+    ),
+}
+
+TABLE_DIR = '.tmp'
+TABLE_EXTENSION = '.arrow'
+
+
+def table_path(name, directory=TABLE_DIR):
+    """Default location of an intermediate table."""
+    return os.path.join(directory, f"{name}{TABLE_EXTENSION}")
+
+
+def to_arrow(data, name):
+    """Build an Arrow table for schema `name` from a DataFrame or a list of record dicts.
+
+    Columns are selected and cast to the schema; extra columns are dropped and
+    a missing column raises ValueError.
+    """
+    schema = SCHEMAS[name]
+    if isinstance(data, pd.DataFrame):
+        missing = [c for c in schema.names if c not in data.columns]
+        if missing:
+            raise ValueError(f"{name}: missing columns {missing}")
+        columns = {c: data[c].tolist() for c in schema.names}
+        return pa.Table.from_pydict(columns, schema=schema)
+    records = list(data)
+    if records:
+        missing = [c for c in schema.names if c not in records[0]]
+        if missing:
+            raise ValueError(f"{name}: missing columns {missing}")
+    return pa.Table.from_pylist(records, schema=schema)
+
+
+def write_table(data, name, path=None):
+    """Write a DataFrame or record list as the typed table `name`. Returns the path."""
+    path = path or table_path(name)
+    table = to_arrow(data, name)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.part"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(name, path=None):
+    """Read the typed table `name` into a DataFrame, checking it against the schema."""
+    path = path or table_path(name)
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    expected = SCHEMAS[name]
+    if not table.schema.equals(expected):
+        raise ValueError(f"{path}: schema does not match '{name}'")
+    return table.to_pandas()
@@ -0,0 +1,77 @@
+"""
+Character-trigram inverted index over SportyBet team names.
+
+match_games.py normally looks for a fixture's teams only inside the one
+SportyBet detail league its league resolved to, so a wrong or missing league
+mapping loses the team match. Scoring a fixture against every game would fix
+that but is slow. This index maps each trigram of every (normalized) home and
+away name to the games that contain it. A lookup only touches the postings of
+the fixture's own trigrams, ranks those games by trigram similarity and
+returns the top K, and the fuzzy scorer then runs on just those candidates.
+
+Names are padded as "  name " so that the start of a name carries extra
+weight, the same way PostgreSQL's pg_trgm pads words. Similarity per side is
+the Jaccard index of the trigram sets, and a game's candidate score is the sum
+over home and away.
+"""
+
+import numpy as np
+
+DEFAULT_TOP_K = 25
+
+
+def trigrams(name):
+    """Set of character trigrams of a normalized name (empty for an empty name)."""
+    if not name:
+        return set()
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_team_index(home_names, away_names):
+    """Index parallel lists of normalized home/away names; position i is game i.
+
+    Returns a dict with per side (0 = home, 1 = away):
+      'postings': trigram -> int64 array of game positions
+      'sizes':    number of distinct trigrams in each game's name
+    """
+    postings = ({}, {})
+    sizes = (np.zeros(len(home_names), dtype=np.int64), np.zeros(len(away_names), dtype=np.int64))
+    for side, names in enumerate((home_names, away_names)):
+        for position, name in enumerate(names):
+            grams = trigrams(name)
+            sizes[side][position] = len(grams)
+            for gram in grams:
+                postings[side].setdefault(gram, []).append(position)
+    return {
+        'postings': tuple({gram: np.array(p, dtype=np.int64) for gram, p in side.items()} for side in postings),
+        'sizes': sizes,
+    }
+
+
+def candidate_games(index, home_name, away_name, top_k=DEFAULT_TOP_K, allowed=None):
+    """Positions of the top_k games most similar to a normalized (home, away) fixture.
+
+    Only games sharing at least one trigram with either name are considered,
+    and, when given, only games whose position is in the sorted array `allowed`.
+    Ordered by descending score, ties by position, so results are deterministic.
+    """
+    positions, scores = [], []
+    for side, name in enumerate((home_name, away_name)):
+        grams = trigrams(name)
+        hits = [index['postings'][side][gram] for gram in grams if gram in index['postings'][side]]
+        if not hits:
+            continue
+        games, shared = np.unique(np.concatenate(hits), return_counts=True)
+        positions.append(games)
+        scores.append(shared / (len(grams) + index['sizes'][side][games] - shared))
+    if not positions:
+        return np.zeros(0, dtype=np.int64)
+
+    games, inverse = np.unique(np.concatenate(positions), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate(scores), minlength=len(games))
+    if allowed is not None:
+        keep = np.isin(games, allowed, assume_unique=True)
+        games, totals = games[keep], totals[keep]
+    order = np.lexsort((games, -totals))[:top_k]
+    return games[order]
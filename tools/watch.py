@@ -0,0 +1,186 @@
+"""
+Watch the raw snapshots in .tmp/ and keep the published predictions current.
+
+Runs until interrupted. The parsed SoccerVista predictions, the SportyBet
+sidebar/games and every league and team resolution are kept in memory. When
+a snapshot changes (e.g. a scrape_runner.py refresh rewrote it):
+
+  soccervista_raw.md  -> re-parse that file; only fixtures not seen before are matched
+  sportybet_raw.md    -> re-parse that file; leagues are re-resolved only if the
+                         sidebar or the detail league list changed, and teams only
+                         for detail leagues whose games changed
+
+then matched_predictions.xlsx/.csv, .tmp/matched_predictions.arrow and the
+website predictions.json (plus its shards with --shard-dir, see csv_to_json.py)
+are rewritten atomically.
+
+Team matching uses the same kickoff window as match_games.py, dated from the
+SoccerVista snapshot each time it changes.
+
+Accepted resolutions still go to the alias store (ALIAS_DB, as in
+match_games.py). Restart the watcher after editing aliases by hand.
+
+Usage:
+  python3 tools/watch.py [--soccervista PATH] [--sportybet PATH] [--json PATH]
+      [--shard-dir DIR] [--cross-league] [--kickoff-tolerance MINUTES]
+      [--sportybet-utc-offset HOURS] [--no-kickoff-filter] [--interval 0.5] [--once]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from alias_store import DEFAULT_ALIAS_DB, open_store
+from combine_predictions import infer_snapshot_date
+from csv_to_json import write_prediction_shards, write_predictions_json
+from match_games import (
+    add_normalized_columns, load_soccervista_predictions, match_predictions,
+    new_match_cache, rank_matches, refresh_match_cache, write_match_outputs,
+)
+from kickoff_index import DEFAULT_SPORTYBET_UTC_OFFSET, DEFAULT_TOLERANCE_MINUTES, kickoff_window
+from metrics import count, instrumented, span
+from parse_sportybet import parse_sportybet_page
+
+DEFAULT_SOCCERVISTA = '.tmp/soccervista_raw.md'
+DEFAULT_SPORTYBET = '.tmp/sportybet_raw.md'
+WEBSITE_JSON = 'website/public/data/predictions.json'
+# Seconds between checks of the snapshot files
+DEFAULT_INTERVAL = 0.5
+
+
+def file_signature(path):
+    """(mtime, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_sportybet(path):
+    """Parse a SportyBet page into (sidebar league records, games DataFrame), both normalized."""
+    with span('parse'):
+        sidebar, games = parse_sportybet_page(path)
+    with span('normalize'):
+        sidebar_leagues = add_normalized_columns(pd.DataFrame(sidebar)).to_dict('records') if sidebar else []
+        sb_games_df = add_normalized_columns(pd.DataFrame(games)) if games else pd.DataFrame()
+    return sidebar_leagues, sb_games_df
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def rematch(state, alias_conn, json_path, shard_dir=None, cross_league=False):
+    """Match the in-memory predictions against the in-memory SportyBet data and publish."""
+    result = match_predictions(state['sv_df'], state['sidebar_leagues'], state['sb_games_df'],
+                               alias_conn, verbose=False, cache=state['cache'], cross_league=cross_league,
+                               kickoff_window=state['window'])
+    if alias_conn:
+        alias_conn.commit()
+
+    league_tiers, team_tiers = result['league_tiers'], result['team_tiers']
+    summary = (f"leagues {league_tiers['cached']} cached / "
+               f"{sum(league_tiers.values()) - league_tiers['cached']} resolved, "
+               f"teams {team_tiers['cached']} cached / "
+               f"{sum(team_tiers.values()) - team_tiers['cached']} matched")
+
+    matched = result['matched']
+    if matched.empty:
+        return f"no matches ({summary}); keeping previous outputs"
+
+    result_df = rank_matches(matched, state['date'])
+    write_match_outputs(result_df)
+    with span('export'):
+        data = write_predictions_json(result_df, json_path)
+        if shard_dir:
+            write_prediction_shards(result_df, shard_dir, data)
+    count('publishes')
+    return f"published {len(result_df)} predictions ({summary})"
+
+
+@instrumented('watch')
+def main():
+    parser = argparse.ArgumentParser(description="Re-match incrementally whenever a snapshot changes")
+    parser.add_argument('--soccervista', default=DEFAULT_SOCCERVISTA, help="SoccerVista snapshot to watch")
+    parser.add_argument('--sportybet', default=DEFAULT_SPORTYBET, help="SportyBet snapshot to watch")
+    parser.add_argument('--json', default=WEBSITE_JSON, help="Website predictions.json to keep current")
+    parser.add_argument('--shard-dir', help="Also keep sharded, precompressed JSON current here")
+    parser.add_argument('--cross-league', action='store_true',
+                        help="Search every league for fixtures without a team match (see match_games.py)")
+    parser.add_argument('--kickoff-tolerance', type=float, default=DEFAULT_TOLERANCE_MINUTES,
+                        help="Only match games kicking off within this many minutes of the prediction")
+    parser.add_argument('--sportybet-utc-offset', type=float, default=DEFAULT_SPORTYBET_UTC_OFFSET,
+                        help="UTC offset (hours) of the SportyBet kickoff times")
+    parser.add_argument('--no-kickoff-filter', action='store_true',
+                        help="Score every game in the league regardless of kickoff")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between checks for changed snapshots")
+    parser.add_argument('--once', action='store_true', help="Load, publish once and exit")
+    args = parser.parse_args()
+
+    # Set ALIAS_DB to an empty string to disable the alias store
+    alias_db = os.getenv('ALIAS_DB', DEFAULT_ALIAS_DB)
+    alias_conn = open_store(alias_db) if alias_db else None
+
+    state = {'sv_df': None, 'sidebar_leagues': None, 'sb_games_df': None, 'date': None,
+             'window': None, 'cache': new_match_cache()}
+    seen = {args.soccervista: None, args.sportybet: None}
+
+    log(f"Watching {args.soccervista} and {args.sportybet} (every {args.interval}s, Ctrl-C to stop)")
+    try:
+        while True:
+            start = time.perf_counter()
+            changes = []
+
+            signature = file_signature(args.soccervista)
+            if signature and signature != seen[args.soccervista]:
+                seen[args.soccervista] = signature
+                parsed, state['sv_df'] = load_soccervista_predictions(args.soccervista)
+                state['date'] = infer_snapshot_date(args.soccervista)
+                if not args.no_kickoff_filter:
+                    window = kickoff_window(args.kickoff_tolerance, args.sportybet_utc_offset, state['date'])
+                    # Team resolutions were made within the old window
+                    if window != state['window']:
+                        state['cache']['teams'].clear()
+                        state['window'] = window
+                changes.append(f"soccervista: {parsed} parsed, {len(state['sv_df'])} at 60%+")
+
+            signature = file_signature(args.sportybet)
+            if signature and signature != seen[args.sportybet]:
+                seen[args.sportybet] = signature
+                state['sidebar_leagues'], state['sb_games_df'] = load_sportybet(args.sportybet)
+                changed_leagues = refresh_match_cache(state['cache'], state['sidebar_leagues'],
+                                                      state['sb_games_df'])
+                changes.append(f"sportybet: {len(state['sidebar_leagues'])} sidebar leagues, "
+                               f"{len(state['sb_games_df'])} games, "
+                               f"{len(changed_leagues)} detail league(s) changed")
+
+            ready = state['sv_df'] is not None and state['sidebar_leagues'] is not None
+            if changes and ready:
+                outcome = rematch(state, alias_conn, args.json, args.shard_dir, args.cross_league)
+                log(f"{'; '.join(changes)} -> {outcome} in {time.perf_counter() - start:.2f}s")
+            elif changes:
+                log(f"{'; '.join(changes)} -> waiting for the other snapshot")
+
+            if args.once:
+                if not ready:
+                    log("Both snapshots are needed; nothing published")
+                    sys.exit(1)
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        log("Stopped")
+    finally:
+        if alias_conn:
+            alias_conn.commit()
+            alias_conn.close()
+
+
+if __name__ == "__main__":
+    main()